@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+import datetime
+import json
+import os
+
+import numpy as np
+
+import analytics
+import history_columnar
+import history_store
+
+# Numero di righe di ciascuna classifica
+TOP_N = int(os.environ.get("AGGREGATES_TOP_N", "20"))
+
+# Finestre (giorni) delle medie nei riepiloghi per item
+SUMMARY_WINDOWS = (7, 30)
+
+# Finestra (giorni) delle variazioni di prezzo nelle classifiche
+MOVERS_WINDOW = 7
+
+DAILY_TOTALS_FILE = "daily_totals.json"
+LEADERBOARDS_FILE = "leaderboards.json"
+ITEM_SUMMARIES_FILE = "item_summaries.json"
+
+def _load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return default
+
+def _write_file(path, text):
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+
+def item_summary(history, as_of):
+    """
+    Riepilogo di un item al giorno 'as_of' (data dell'ultimo fetch: i dati
+    arrivano fino al giorno precedente):
+      - "as_of", "last_trade_date", "last_price"
+      - "avg_<N>d": prezzo medio ponderato (crediti / venduti) degli ultimi N giorni
+      - "sold_<N>d", "credits_<N>d" per ciascuna finestra in SUMMARY_WINDOWS
+      - "open_offers": offerte aperte nell'ultimo record
+    """
+    summary = {"as_of": as_of.isoformat(), "last_trade_date": None, "last_price": None}
+    records = sorted(history, key=history_store.record_date)
+    for record in reversed(records):
+        if int(record.get("totalSoldItems", "0")) > 0:
+            summary["last_trade_date"] = history_store.record_date(record).isoformat()
+            summary["last_price"] = int(record.get("averagePrice", "0"))
+            break
+    for window in SUMMARY_WINDOWS:
+        start = as_of - datetime.timedelta(days=window)
+        sold = credits = 0
+        for record in records:
+            if start <= history_store.record_date(record) < as_of:
+                sold += int(record.get("totalSoldItems", "0"))
+                credits += int(record.get("totalCreditSum", "0"))
+        summary[f"avg_{window}d"] = round(credits / sold) if sold else None
+        summary[f"sold_{window}d"] = sold
+        summary[f"credits_{window}d"] = credits
+    summary["open_offers"] = int(records[-1].get("totalOpenOffers", "0")) if records else 0
+    return summary
+
+def update_item_summaries(path, all_stats, polled, poll_state, current_date):
+    """
+    Aggiorna i riepiloghi degli items interrogati in questa esecuzione
+    ('polled'): gli altri restano validi alla loro data "as_of". Se il file non
+    esiste vengono calcolati per tutti gli items, alla data dell'ultimo fetch.
+    Gli items mai scambiati e senza offerte aperte non vengono inclusi.
+    Una riga per item, per diff git leggibili.
+    """
+    summaries = _load_json(path, None)
+    if summaries is None:
+        summaries = {}
+        polled = set(all_stats)
+    for classname in polled:
+        if classname not in all_stats:
+            continue
+        as_of = datetime.date.fromisoformat(poll_state.get(classname, current_date.isoformat()))
+        summary = item_summary(all_stats[classname], as_of)
+        if summary["last_trade_date"] is None and not summary["open_offers"]:
+            summaries.pop(classname, None)
+        else:
+            summaries[classname] = summary
+    lines = [f"{json.dumps(classname)}:{json.dumps(summaries[classname], separators=(',', ':'))}" for classname in sorted(summaries)]
+    _write_file(path, "{\n" + ",\n".join(lines) + "\n}\n")
+    return len(polled)
+
+def update_daily_totals(path, matrices):
+    """
+    Totali giornalieri del mercato (items scambiati, oggetti venduti, crediti,
+    prezzo medio ponderato) per i giorni coperti da 'matrices'. I giorni più
+    vecchi restano invariati: l'API non li restituisce più, quindi non possono
+    cambiare. I giorni recenti vengono ricalcolati ad ogni esecuzione perché
+    gli items interrogati meno spesso li completano nei giorni successivi.
+    """
+    totals = _load_json(path, {})
+    sold = matrices["totalSoldItems"]
+    credits = matrices["totalCreditSum"]
+    items_traded = (sold > 0).sum(axis=0)
+    sold_per_day = sold.sum(axis=0)
+    credits_per_day = credits.sum(axis=0)
+    for column, day in enumerate(matrices["days"]):
+        totals[history_columnar.day_to_date(day)] = {
+            "items_traded": int(items_traded[column]),
+            "sold": int(sold_per_day[column]),
+            "credits": int(credits_per_day[column]),
+            "average_price": round(credits_per_day[column] / sold_per_day[column]) if sold_per_day[column] else None,
+        }
+    _write_file(path, json.dumps(dict(sorted(totals.items())), indent=2) + "\n")
+    return totals
+
+def _leaderboard(matrices, key, sold, credits, top_n):
+    """
+    Le prime 'top_n' righe per 'key' (solo valori positivi), con venduti,
+    crediti e prezzo medio ponderato.
+    """
+    rows = [row for row in np.argsort(-key, kind="stable")[:top_n] if key[row] > 0]
+    return [
+        {
+            "classname": str(matrices["classnames"][row]),
+            "sold": int(sold[row]),
+            "credits": int(credits[row]),
+            "average_price": round(credits[row] / sold[row]) if sold[row] else None,
+        }
+        for row in rows
+    ]
+
+def build_leaderboards(matrices, top_n=TOP_N):
+    """
+    Classifiche dell'ultimo giorno completo (ultima colonna di 'matrices') e
+    degli ultimi 30 giorni, più le maggiori variazioni di prezzo (vedi analytics.top_movers).
+    """
+    sold = matrices["totalSoldItems"][:, -1]
+    credits = matrices["totalCreditSum"][:, -1]
+    volume = analytics.traded_volume(matrices, 30)
+    movers = analytics.top_movers(matrices, MOVERS_WINDOW, top_n)
+    return {
+        "date": history_columnar.day_to_date(matrices["days"][-1]),
+        "most_traded_day": _leaderboard(matrices, credits, sold, credits, top_n),
+        "most_sold_day": _leaderboard(matrices, sold, sold, credits, top_n),
+        "most_traded_30d": _leaderboard(matrices, volume["credits"], volume["sold"], volume["credits"], top_n),
+        f"gainers_{MOVERS_WINDOW}d": [{**row, "change": round(row["change"], 4)} for row in movers["gainers"]],
+        f"losers_{MOVERS_WINDOW}d": [{**row, "change": round(row["change"], 4)} for row in movers["losers"]],
+    }
+
+def update(all_stats, polled, poll_state, aggregates_dir, current_date):
+    """
+    Aggiorna i file precalcolati in 'aggregates_dir' al termine di un'esecuzione
+    di update_stats: totali giornalieri, classifiche e riepiloghi per item.
+    L'ultimo giorno completo è quello precedente a 'current_date'. Alla prima
+    esecuzione i totali giornalieri coprono l'intera cronologia, poi solo gli
+    ultimi HISTORY_LIMIT giorni.
+    """
+    os.makedirs(aggregates_dir, exist_ok=True)
+    totals_path = os.path.join(aggregates_dir, DAILY_TOTALS_FILE)
+    days = history_store.HISTORY_LIMIT if os.path.exists(totals_path) else None
+    end_day = history_columnar.date_to_day((current_date - datetime.timedelta(days=1)).isoformat())
+    matrices = analytics.build_matrices(history_columnar.to_columnar(all_stats), days=days, end_day=end_day)
+    update_daily_totals(totals_path, matrices)
+    leaderboards = build_leaderboards(matrices)
+    _write_file(os.path.join(aggregates_dir, LEADERBOARDS_FILE), json.dumps(leaderboards, indent=2) + "\n")
+    summaries = update_item_summaries(os.path.join(aggregates_dir, ITEM_SUMMARIES_FILE), all_stats, polled, poll_state, current_date)
+    print(f"Aggregates updated in {aggregates_dir} ({summaries} item summaries refreshed).")
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Analisi vettoriali della cronologia dei prezzi.
+
+La cronologia (vedi history_columnar) viene trasformata in una matrice densa
+per ciascun campo, con una riga per classname e una colonna per giorno:
+  - "averagePrice" e "totalOpenOffers": NaN nei giorni senza record
+  - "totalSoldItems" e "totalCreditSum": 0 nei giorni senza record
+Tutte le interrogazioni lavorano sull'intero catalogo con operazioni NumPy,
+senza cicli Python sui record.
+"""
+import argparse
+import time
+
+import numpy as np
+
+import history_columnar
+import history_store
+import hotels
+
+# Campi per cui un giorno senza record equivale a zero (nessuno scambio)
+VOLUME_FIELDS = ("totalSoldItems", "totalCreditSum")
+
+def load_arrays(hotel=hotels.DEFAULT_HOTEL, npz_path=None):
+    """
+    Carica la cronologia in formato colonnare: da un file npz se indicato,
+    altrimenti dallo store dell'hotel.
+    """
+    if npz_path:
+        return history_columnar.load_npz(npz_path)
+    paths = hotels.output_paths(hotel)
+    return history_columnar.to_columnar(history_store.load_all(paths["store_dir"], paths["legacy_file"]))
+
+def load_furnilines(hotel=hotels.DEFAULT_HOTEL):
+    """
+    Restituisce classname -> furniline dal furnidata dell'hotel (tramite la cache condivisa).
+    """
+    import update_stats
+
+    return {item["classname"]: item["furniline"] for item in update_stats.load_classnames(hotel)}
+
+def build_matrices(arrays, days=None, end_day=None):
+    """
+    Costruisce le matrici dense (classnames x giorni) a partire dagli array colonnari.
+    'end_day' (numero di giorno, vedi history_columnar.date_to_day) è l'ultima
+    colonna, di default l'ultimo giorno presente; 'days' (almeno 1) limita il
+    numero di colonne, di default dal primo giorno presente. Se non ci sono
+    record fino a 'end_day' (store vuoto o 'end_day' precedente al primo
+    giorno) le matrici hanno la sola colonna 'end_day', senza dati.
+    Se per lo stesso giorno esistono più record vale l'ultimo.
+    Restituisce un dizionario con "classnames", "start_day", "days" e una
+    matrice float64 per ciascun campo di history_columnar.FIELDS.
+    """
+    classnames = arrays["classnames"]
+    day = arrays["day"]
+    if days is not None and days < 1:
+        raise ValueError(f"The matrices need at least one day, got days={days}")
+    if end_day is None:
+        end_day = int(day.max()) if len(day) else 0
+    if days is None:
+        start_day = min(int(day.min()), end_day) if len(day) else end_day
+    else:
+        start_day = end_day - days + 1
+    n_days = end_day - start_day + 1
+    rows = np.repeat(np.arange(len(classnames)), np.diff(arrays["offsets"]))
+    cols = day.astype(np.int64) - start_day
+    keep = (cols >= 0) & (cols < n_days)
+    rows, cols = rows[keep], cols[keep]
+    matrices = {
+        "classnames": classnames,
+        "start_day": start_day,
+        "days": np.arange(start_day, end_day + 1),
+    }
+    for field in history_columnar.FIELDS:
+        fill = 0.0 if field in VOLUME_FIELDS else np.nan
+        matrix = np.full((len(classnames), n_days), fill)
+        matrix[rows, cols] = arrays[field][keep]
+        matrices[field] = matrix
+    return matrices
+
+def _sum_count(matrix):
+    valid = ~np.isnan(matrix)
+    return np.where(valid, matrix, 0.0).sum(axis=1), valid.sum(axis=1)
+
+def _divide(numerator, denominator):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), np.nan)
+
+def window_mean(matrix, window, offset=0):
+    """
+    Media per riga (ignorando i NaN) delle 'window' colonne che terminano
+    'offset' colonne prima dell'ultima. NaN se la finestra non ha valori.
+    """
+    end = matrix.shape[1] - offset
+    sums, counts = _sum_count(matrix[:, max(0, end - window):end])
+    return _divide(sums, counts)
+
+def rolling_mean(matrix, window):
+    """
+    Media mobile su 'window' giorni (ignorando i NaN) per ogni riga e ogni
+    giorno: la colonna j è la media delle colonne (j - window, j].
+    """
+    valid = ~np.isnan(matrix)
+    zeros = np.zeros((matrix.shape[0], 1))
+    sums = np.concatenate([zeros, np.cumsum(np.where(valid, matrix, 0.0), axis=1)], axis=1)
+    counts = np.concatenate([zeros, np.cumsum(valid, axis=1)], axis=1)
+    lagged = np.maximum(np.arange(1, matrix.shape[1] + 1) - window, 0)
+    return _divide(sums[:, 1:] - sums[:, lagged], counts[:, 1:] - counts[:, lagged])
+
+def forward_fill(matrix):
+    """
+    Sostituisce ogni NaN con l'ultimo valore precedente della stessa riga.
+    """
+    valid = ~np.isnan(matrix)
+    index = np.where(valid, np.arange(matrix.shape[1]), 0)
+    np.maximum.accumulate(index, axis=1, out=index)
+    return matrix[np.arange(matrix.shape[0])[:, None], index]
+
+def traded_volume(matrices, window=None):
+    """
+    Oggetti venduti e crediti scambiati per classname negli ultimi 'window'
+    giorni (di default l'intero intervallo delle matrici).
+    """
+    start = 0 if window is None else -window
+    return {
+        "sold": matrices["totalSoldItems"][:, start:].sum(axis=1),
+        "credits": matrices["totalCreditSum"][:, start:].sum(axis=1),
+    }
+
+def volatility(matrices, window=30):
+    """
+    Deviazione standard dei rendimenti logaritmici giornalieri di averagePrice
+    negli ultimi 'window' giorni. Il rendimento di un giorno con scambi è
+    calcolato rispetto all'ultimo prezzo precedente; NaN con meno di due rendimenti.
+    """
+    price = matrices["averagePrice"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        log_price = np.where(price > 0, np.log(np.where(price > 0, price, 1)), np.nan)
+    previous = np.concatenate([np.full((price.shape[0], 1), np.nan), forward_fill(log_price)[:, :-1]], axis=1)
+    returns = (log_price - previous)[:, -window:]
+    sums, counts = _sum_count(returns)
+    mean = _divide(sums, counts)
+    squares, _ = _sum_count((returns - mean[:, None]) ** 2)
+    return np.where(counts >= 2, np.sqrt(_divide(squares, counts)), np.nan)
+
+def top_movers(matrices, window=7, limit=10, min_sold=1):
+    """
+    Variazione percentuale del prezzo medio degli ultimi 'window' giorni
+    rispetto ai 'window' giorni precedenti, per gli items con almeno
+    'min_sold' oggetti venduti nella finestra recente.
+    Restituisce {"gainers": [...], "losers": [...]} con al massimo 'limit'
+    dizionari {"classname", "previous", "recent", "change"} ciascuno.
+    """
+    price = matrices["averagePrice"]
+    recent = window_mean(price, window)
+    previous = window_mean(price, window, offset=window)
+    change = _divide(recent - previous, previous)
+    sold = traded_volume(matrices, window)["sold"]
+    candidates = np.flatnonzero(np.isfinite(change) & (sold >= min_sold))
+    order = candidates[np.argsort(change[candidates], kind="stable")]
+
+    def describe(rows):
+        return [
+            {
+                "classname": str(matrices["classnames"][row]),
+                "previous": float(previous[row]),
+                "recent": float(recent[row]),
+                "change": float(change[row]),
+            }
+            for row in rows
+        ]
+
+    return {
+        "gainers": describe([row for row in order[::-1][:limit] if change[row] > 0]),
+        "losers": describe([row for row in order[:limit] if change[row] < 0]),
+    }
+
+def furniline_aggregates(matrices, furnilines, window=30):
+    """
+    Aggregati per furniline negli ultimi 'window' giorni: numero di items,
+    items scambiati, oggetti venduti, crediti e prezzo medio ponderato
+    (crediti / oggetti venduti). 'furnilines' è classname -> furniline; gli
+    items senza furniline sono raggruppati sotto "".
+    Restituisce una lista ordinata per crediti decrescenti.
+    """
+    names = np.array([furnilines.get(str(classname)) or "" for classname in matrices["classnames"]], dtype=np.str_)
+    lines, inverse = np.unique(names, return_inverse=True)
+    volume = traded_volume(matrices, window)
+    items = np.bincount(inverse, minlength=len(lines))
+    traded = np.bincount(inverse, weights=volume["sold"] > 0, minlength=len(lines))
+    sold = np.bincount(inverse, weights=volume["sold"], minlength=len(lines))
+    credits = np.bincount(inverse, weights=volume["credits"], minlength=len(lines))
+    average_price = _divide(credits, sold)
+    return [
+        {
+            "furniline": str(lines[i]),
+            "items": int(items[i]),
+            "traded_items": int(traded[i]),
+            "sold": int(sold[i]),
+            "credits": int(credits[i]),
+            "average_price": None if np.isnan(average_price[i]) else float(average_price[i]),
+        }
+        for i in np.argsort(-credits, kind="stable")
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description="Whole-catalogue market report from the price history.")
+    parser.add_argument("--hotel", default=hotels.DEFAULT_HOTEL, choices=sorted(hotels.HOTELS))
+    parser.add_argument("--npz", help="read the history from an npz file (see history_columnar) instead of the store")
+    parser.add_argument("--window", type=int, default=7, help="window (days) for top movers")
+    parser.add_argument("--limit", type=int, default=10, help="rows per table")
+    parser.add_argument("--furnilines", action="store_true", help="include per-furniline aggregates (reads the furnidata)")
+    args = parser.parse_args()
+
+    arrays = load_arrays(args.hotel, args.npz)
+    start = time.perf_counter()
+    matrices = build_matrices(arrays)
+    movers = top_movers(matrices, args.window, args.limit)
+    volume = traded_volume(matrices, 30)
+    vol = volatility(matrices, 30)
+    elapsed = time.perf_counter() - start
+    classnames = matrices["classnames"]
+    print(f"{len(classnames)} items, {len(matrices['days'])} days "
+          f"({history_columnar.day_to_date(matrices['days'][0])} - {history_columnar.day_to_date(matrices['days'][-1])}), computed in {elapsed * 1000:.1f} ms.")
+
+    for kind in ("gainers", "losers"):
+        print(f"\nTop {kind} ({args.window} days):")
+        for row in movers[kind]:
+            print(f"  {row['classname']:<40} {row['previous']:>10.0f} -> {row['recent']:>10.0f}  {row['change']:+.1%}")
+    print("\nMost traded (30 days, credits):")
+    for row in np.argsort(-volume["credits"], kind="stable")[:args.limit]:
+        print(f"  {classnames[row]:<40} {int(volume['sold'][row]):>8} sold  {int(volume['credits'][row]):>12} credits")
+    print("\nMost volatile (30 days):")
+    candidates = np.flatnonzero(np.isfinite(vol))
+    for row in candidates[np.argsort(-vol[candidates], kind="stable")][:args.limit]:
+        print(f"  {classnames[row]:<40} {vol[row]:.3f}")
+    if args.furnilines:
+        print("\nFurnilines (30 days):")
+        for row in furniline_aggregates(matrices, load_furnilines(args.hotel))[:args.limit]:
+            average_price = f"{row['average_price']:.0f}" if row["average_price"] is not None else "-"
+            print(f"  {row['furniline'] or '(none)':<24} {row['traded_items']:>5}/{row['items']:<5} items  {row['sold']:>8} sold  {row['credits']:>12} credits  avg {average_price}")
+
+if __name__ == "__main__":
+    main()
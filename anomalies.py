@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Rilevamento di anomalie di prezzo e di volume sull'intero catalogo.
+
+Per ogni item e per ciascuno degli ultimi CHECK_DAYS giorni il valore di
+averagePrice e di totalSoldItems viene confrontato con i WINDOW giorni
+precedenti tramite uno z-score robusto:
+    z = 0.6745 * (valore - mediana) / MAD
+dove MAD è la deviazione assoluta mediana della finestra. Se la MAD è nulla
+(es. più di metà dei giorni senza vendite) si usa la deviazione assoluta
+media (z = (valore - mediana) / (1.2533 * MeanAD)). La scala è limitata dal
+basso:
+  - per i prezzi da MIN_RELATIVE_MAD volte la mediana (prezzi quasi costanti) e da 1;
+  - per i volumi, che sono conteggi, dalla deviazione standard della
+    finestra, dalla deviazione di Poisson sqrt(media + 1) e da
+    VOLUME_MIN_SCALE: gli items che vendono raramente hanno mediana e MAD
+    nulle e senza questi limiti ogni giorno con qualche vendita
+    risulterebbe anomalo.
+Il calcolo usa le matrici dense di analytics, senza cicli sugli items.
+"""
+import argparse
+import datetime
+import json
+import os
+import warnings
+
+import numpy as np
+
+import analytics
+import discord_dispatcher
+import history_columnar
+import history_store
+import hotels
+
+# Discord webhook per gli avvisi (impostato come secret: DISCORD_WEBHOOK_ANOMALIES)
+DISCORD_WEBHOOK = os.environ.get("DISCORD_WEBHOOK_ANOMALIES")
+
+# Soglia dello z-score robusto (in valore assoluto)
+THRESHOLD = float(os.environ.get("ANOMALY_THRESHOLD", "5"))
+
+# Giorni della finestra di riferimento
+WINDOW = int(os.environ.get("ANOMALY_WINDOW", "30"))
+
+# Giorni controllati ad ogni esecuzione: gli items "warm" vengono interrogati
+# ogni 3 giorni, quindi i loro record recenti arrivano in ritardo
+CHECK_DAYS = 3
+
+# Giorni con scambi necessari nella finestra per valutare il prezzo
+MIN_BASELINE_DAYS = 5
+
+# Oggetti venduti minimi perché un picco di volume venga segnalato
+MIN_SOLD = int(os.environ.get("ANOMALY_MIN_SOLD", "5"))
+
+# Limite inferiore della scala in proporzione alla mediana
+MIN_RELATIVE_MAD = 0.05
+
+# Limite inferiore della scala dei volumi: un item che di solito non vende
+# viene segnalato solo da THRESHOLD * VOLUME_MIN_SCALE oggetti venduti in un giorno
+VOLUME_MIN_SCALE = float(os.environ.get("ANOMALY_VOLUME_MIN_SCALE", "4"))
+
+# Numero massimo di anomalie inviate su Discord per esecuzione
+MAX_ALERTS = 25
+
+ANOMALIES_FILE = "anomalies.json"
+
+def robust_zscores(values, baseline, min_count=1, counts=False):
+    """
+    z-score robusti di 'values' (items x giorni) rispetto a 'baseline'
+    (items x giorni x WINDOW), ignorando i NaN. Con 'counts' i valori sono
+    conteggi e la scala ha il limite inferiore dei volumi. Restituisce
+    (z, mediana, MAD); z è NaN dove la finestra ha meno di 'min_count' valori.
+    """
+    with warnings.catch_warnings():
+        # Finestre senza alcun valore: mediana NaN, gestita sotto
+        warnings.simplefilter("ignore", RuntimeWarning)
+        median = np.nanmedian(baseline, axis=-1)
+        deviations = np.abs(baseline - median[..., None])
+        mad = np.nanmedian(deviations, axis=-1)
+        mean_ad = np.nanmean(deviations, axis=-1)
+    # Scala equivalente alla deviazione standard per dati normali
+    scale = np.where(mad > 0, mad / 0.6745, 1.2533 * mean_ad)
+    if counts:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            spread = np.maximum(np.nanstd(baseline, axis=-1), np.sqrt(np.nanmean(baseline, axis=-1) + 1))
+        scale = np.maximum(np.maximum(scale, spread), VOLUME_MIN_SCALE)
+    else:
+        scale = np.maximum(np.maximum(scale, MIN_RELATIVE_MAD * np.abs(median)), 1.0)
+    z = (values - median) / scale
+    z[(~np.isnan(baseline)).sum(axis=-1) < min_count] = np.nan
+    return z, median, mad
+
+def detect(matrices, threshold=THRESHOLD, window=WINDOW, check_days=CHECK_DAYS):
+    """
+    Anomalie negli ultimi 'check_days' giorni di 'matrices' (vedi
+    analytics.build_matrices, con almeno window + check_days colonne).
+    Restituisce una lista di {"classname", "date", "field", "value", "median",
+    "mad", "z"} ordinata per |z| decrescente.
+    """
+    anomalies = []
+    columns = np.arange(matrices["days"].size - check_days, matrices["days"].size)
+    sold = matrices["totalSoldItems"]
+    for field in ("averagePrice", "totalSoldItems"):
+        matrix = matrices[field]
+        baseline = np.lib.stride_tricks.sliding_window_view(matrix[:, :-1], window, axis=1)[:, columns - window]
+        values = matrix[:, columns]
+        if field == "averagePrice":
+            z, median, mad = robust_zscores(values, baseline, MIN_BASELINE_DAYS)
+            # Solo i giorni con scambi hanno un prezzo significativo
+            z[~(sold[:, columns] > 0)] = np.nan
+        else:
+            z, median, mad = robust_zscores(values, baseline, counts=True)
+            z[values < MIN_SOLD] = np.nan
+        with np.errstate(invalid="ignore"):
+            rows, cols = np.nonzero(np.abs(z) >= threshold)
+        for row, col in zip(rows, cols):
+            anomalies.append({
+                "classname": str(matrices["classnames"][row]),
+                "date": history_columnar.day_to_date(matrices["days"][columns[col]]),
+                "field": field,
+                "value": int(values[row, col]),
+                "median": round(float(median[row, col]), 2),
+                "mad": round(float(mad[row, col]), 2),
+                "z": round(float(z[row, col]), 2),
+            })
+    return sorted(anomalies, key=lambda anomaly: (-abs(anomaly["z"]), anomaly["classname"], anomaly["date"]))
+
+def _key(anomaly):
+    return (anomaly["classname"], anomaly["date"], anomaly["field"])
+
+def build_embeds(anomalies, hotel):
+    embeds = []
+    for anomaly in anomalies[:MAX_ALERTS]:
+        kind = "Price" if anomaly["field"] == "averagePrice" else "Volume"
+        direction = "spike" if anomaly["z"] > 0 else "drop"
+        embeds.append({
+            "title": f"{kind} {direction}: {anomaly['classname']} ({hotel})",
+            "description": (
+                f"{anomaly['field']} on {anomaly['date']}: **{anomaly['value']}** "
+                f"(median {anomaly['median']}, MAD {anomaly['mad']}, z {anomaly['z']})"
+            ),
+            "color": 15158332 if anomaly["z"] > 0 else 3447003,
+        })
+    if len(anomalies) > MAX_ALERTS:
+        embeds.append({
+            "title": f"{len(anomalies) - MAX_ALERTS} more anomalies ({hotel})",
+            "description": f"See {ANOMALIES_FILE} for the full list.",
+        })
+    return embeds
+
+def update(all_stats, aggregates_dir, current_date, hotel=hotels.DEFAULT_HOTEL, webhook=None):
+    """
+    Rileva le anomalie fino all'ultimo giorno completo (precedente a
+    'current_date'), le salva in 'aggregates_dir' e invia su Discord quelle
+    non presenti nel file precedente (se il webhook è impostato).
+    Restituisce la lista delle anomalie.
+    """
+    end_day = history_columnar.date_to_day((current_date - datetime.timedelta(days=1)).isoformat())
+    matrices = analytics.build_matrices(history_columnar.to_columnar(all_stats), days=WINDOW + CHECK_DAYS, end_day=end_day)
+    anomalies = detect(matrices)
+
+    path = os.path.join(aggregates_dir, ANOMALIES_FILE)
+    previous = set()
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                previous = {_key(anomaly) for anomaly in json.load(f)["anomalies"]}
+        except Exception as e:
+            print(f"Error reading {path}: {e}")
+    os.makedirs(aggregates_dir, exist_ok=True)
+    report = {
+        "date": history_columnar.day_to_date(end_day),
+        "threshold": THRESHOLD,
+        "window": WINDOW,
+        "anomalies": anomalies,
+    }
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(json.dumps(report, indent=2) + "\n")
+    os.replace(tmp_file, path)
+
+    new_anomalies = [anomaly for anomaly in anomalies if _key(anomaly) not in previous]
+    print(f"Detected {len(anomalies)} anomalies ({len(new_anomalies)} new).")
+    webhook = webhook or DISCORD_WEBHOOK
+    if new_anomalies and webhook:
+        discord_dispatcher.send_embeds(webhook, build_embeds(new_anomalies, hotel))
+    return anomalies
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect price and volume anomalies in the price history.")
+    parser.add_argument("--hotel", default=hotels.DEFAULT_HOTEL, choices=sorted(hotels.HOTELS))
+    parser.add_argument("--date", help="detect as of this date (YYYY-MM-DD, default: today)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD, help="robust z-score threshold")
+    args = parser.parse_args()
+
+    current_date = datetime.date.fromisoformat(args.date) if args.date else datetime.date.today()
+    paths = hotels.output_paths(args.hotel)
+    arrays = history_columnar.to_columnar(history_store.load_all(paths["store_dir"], paths["legacy_file"]))
+    end_day = history_columnar.date_to_day((current_date - datetime.timedelta(days=1)).isoformat())
+    matrices = analytics.build_matrices(arrays, days=WINDOW + CHECK_DAYS, end_day=end_day)
+    for anomaly in detect(matrices, args.threshold):
+        print(f"{anomaly['date']}  {anomaly['field']:<15} z {anomaly['z']:>8}  {anomaly['value']:>10} "
+              f"(median {anomaly['median']})  {anomaly['classname']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+import argparse
+import datetime
+import hashlib
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+# Percorsi serviti dal server (gli stessi di habbo.it)
+FURNIDATA_PATH = "/gamedata/furnidata_json/0"
+EXTERNAL_VARIABLES_PATH = "/gamedata/external_variables/0"
+EXTERNAL_FLASH_TEXTS_PATH = "/gamedata/external_flash_texts/0"
+ROOM_STATS_PREFIX = "/api/public/marketplace/stats/roomItem/"
+WALL_STATS_PREFIX = "/api/public/marketplace/stats/wallitem/"
+
+# Furniline usate per il catalogo sintetico (una è esclusa da update_stats)
+FURNILINES = ("rare", "classic", "xmas", "habbo15", "pixel", "val", "hween")
+
+def make_furnidata(size, seed=0, wall_ratio=0.1):
+    """
+    Genera un furnidata sintetico con 'size' furnitype (una frazione 'wall_ratio' sono wallitem).
+    """
+    rng = random.Random(seed)
+    wall_count = int(size * wall_ratio)
+    def furnitype(i, kind):
+        furniline = rng.choice(FURNILINES)
+        return {
+            "id": i,
+            "classname": f"{kind}_{furniline}_{i}",
+            "revision": rng.randint(1, 70000),
+            "category": "other",
+            "name": f"Synthetic {kind} {i}",
+            "description": f"Synthetic furni number {i}",
+            "furniline": furniline,
+            "rare": rng.random() < 0.05,
+        }
+    return {
+        "roomitemtypes": {"furnitype": [furnitype(i, "room") for i in range(size - wall_count)]},
+        "wallitemtypes": {"furnitype": [furnitype(i, "wall") for i in range(wall_count)]},
+    }
+
+def make_key_values(size, seed=0):
+    """
+    Genera un file "chiave=valore" sintetico con 'size' righe.
+    """
+    rng = random.Random(seed)
+    return "\n".join(f"synthetic.key.{i}=value {rng.randint(0, 10 ** 6)}" for i in range(size)) + "\n"
+
+def make_stats(classname, stats_date, days=30, activity=0.3):
+    """
+    Risposta sintetica dell'endpoint marketplace per un classname: deterministica
+    per classname, con record solo nei giorni in cui ci sono stati scambi.
+    """
+    rng = random.Random(zlib.crc32(classname.encode("utf-8")))
+    history = []
+    if rng.random() < activity:
+        base_price = rng.randint(1, 5000)
+        for offset in range(-days, 0):
+            if rng.random() < 0.4:
+                sold = rng.randint(1, 20)
+                price = max(1, int(base_price * rng.uniform(0.8, 1.2)))
+                history.append({
+                    "dayOffset": str(offset),
+                    "averagePrice": str(price),
+                    "totalSoldItems": str(sold),
+                    "totalCreditSum": str(price * sold),
+                    "totalOpenOffers": str(rng.randint(0, 10)),
+                })
+    return {"statsDate": stats_date, "history": history}
+
+class MockHabboServer:
+    """
+    Server HTTP locale che imita gli endpoint di habbo.it usati dagli script:
+    furnidata, external_variables, external_flash_texts e le statistiche del
+    marketplace, con latenza configurabile e iniezione di risposte 429.
+    """
+
+    def __init__(self, catalogue_size=12000, text_size=40000, latency=0.0, rate_429=0.0, retry_after=0, port=0, seed=0):
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.stats_date = datetime.date.today().isoformat()
+        self.rng = random.Random(seed)
+        self.counters = {"requests": 0, "stats_requests": 0, "responses_429": 0, "responses_304": 0, "bytes": 0}
+        self.lock = threading.Lock()
+        self.documents = {
+            FURNIDATA_PATH: json.dumps(make_furnidata(catalogue_size, seed)).encode("utf-8"),
+            EXTERNAL_VARIABLES_PATH: make_key_values(text_size // 5, seed).encode("utf-8"),
+            EXTERNAL_FLASH_TEXTS_PATH: make_key_values(text_size, seed + 1).encode("utf-8"),
+        }
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.counters[key] += amount
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_body(self, status, body, content_type, headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+                server.count("bytes", len(body))
+
+            def do_GET(self):
+                server.count("requests")
+                if server.latency:
+                    time.sleep(server.latency)
+                path = self.path.split("?", 1)[0]
+                if path in server.documents:
+                    body = server.documents[path]
+                    etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+                    if self.headers.get("If-None-Match") == etag:
+                        server.count("responses_304")
+                        self.send_response(304)
+                        self.send_header("ETag", etag)
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    content_type = "application/json" if path == FURNIDATA_PATH else "text/plain; charset=utf-8"
+                    self.send_body(200, body, content_type, {"ETag": etag})
+                    return
+                for prefix in (ROOM_STATS_PREFIX, WALL_STATS_PREFIX):
+                    if path.startswith(prefix):
+                        server.count("stats_requests")
+                        with server.lock:
+                            throttled = server.rng.random() < server.rate_429
+                        if throttled:
+                            server.count("responses_429")
+                            self.send_body(429, b"{}", "application/json", {"Retry-After": str(server.retry_after)})
+                            return
+                        classname = unquote(path[len(prefix):])
+                        body = json.dumps(make_stats(classname, server.stats_date)).encode("utf-8")
+                        self.send_body(200, body, "application/json")
+                        return
+                self.send_body(404, b"not found", "text/plain")
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a synthetic Habbo API locally.")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--catalogue-size", type=int, default=12000)
+    parser.add_argument("--text-size", type=int, default=40000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability of answering a stats request with 429")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+    server = MockHabboServer(args.catalogue_size, args.text_size, args.latency, args.rate_429, args.retry_after, args.port)
+    print(f"Mock Habbo API listening on {server.base_url} (set HABBO_BASE_URL to use it).")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
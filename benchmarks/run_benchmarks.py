@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+import argparse
+import copy
+import datetime
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Rende importabili i moduli condivisi nella root del repository
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(CURRENT_DIR))
+sys.path.insert(0, CURRENT_DIR)
+import mock_habbo_server
+
+# Dimensioni dei dataset: catalogo furnidata e righe di external_flash_texts
+SCALES = {
+    "realistic": {"catalogue_size": 12000, "text_size": 40000},
+    "10x": {"catalogue_size": 120000, "text_size": 400000},
+}
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+def bench_update_stats(scale, args):
+    """
+    Esecuzione completa di update_stats (tutti gli items, --full) contro il server locale.
+    """
+    import update_stats
+
+    server = mock_habbo_server.MockHabboServer(
+        catalogue_size=scale["catalogue_size"],
+        text_size=0,
+        latency=args.latency,
+        rate_429=args.rate_429,
+        retry_after=0,
+    ).start()
+    os.environ["HABBO_BASE_URL"] = server.base_url
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)
+            elapsed, _ = timed(update_stats.run_hotel, "it", False, True)
+    finally:
+        os.chdir(cwd)
+        del os.environ["HABBO_BASE_URL"]
+        server.stop()
+    counters = server.counters
+    return {
+        "seconds": elapsed,
+        "stats_requests": counters["stats_requests"],
+        "responses_429": counters["responses_429"],
+        "requests_per_second": counters["stats_requests"] / elapsed if elapsed else None,
+    }
+
+def synthetic_history(size):
+    import update_stats
+
+    today = datetime.date.today()
+    stats = {}
+    for i in range(size):
+        # ~400 prefissi diversi, come i ~380 shard della cronologia reale
+        classname = f"{chr(97 + i % 20)}{chr(97 + i // 20 % 20)}_item_{i}"
+        api_result = mock_habbo_server.make_stats(classname, today.isoformat())
+        update_stats.merge_api_result(stats, classname, api_result, today)
+    return stats
+
+def bench_day_offsets(scale, args):
+    """
+    Costo di dayOffset (ex update_day_offsets): vista derivata sull'intera
+    cronologia e salvataggio/caricamento dello store a shard.
+    """
+    import history_store
+
+    stats = synthetic_history(scale["catalogue_size"])
+    records = sum(len(history) for history in stats.values())
+    current_date = datetime.date.today() + datetime.timedelta(days=1)
+    view_seconds, _ = timed(lambda: [history_store.with_day_offsets(history, current_date) for history in stats.values()])
+    with tempfile.TemporaryDirectory() as workdir:
+        store_dir = os.path.join(workdir, "store")
+        save_seconds, _ = timed(history_store.save, stats, None, store_dir, None)
+        load_seconds, _ = timed(history_store.load_all, store_dir, None)
+        one = next(iter(stats))
+        incremental_seconds, _ = timed(history_store.save, stats, {one}, store_dir, None)
+    return {
+        "records": records,
+        "with_day_offsets_seconds": view_seconds,
+        "save_all_seconds": save_seconds,
+        "load_all_seconds": load_seconds,
+        "save_one_item_seconds": incremental_seconds,
+    }
+
+def bench_furnidata_diff(scale, args):
+    """
+    Diff per chiave del furnidata con l'1% di oggetti modificati, aggiunti e rimossi.
+    """
+    from furnidata import furnidata
+
+    rng = random.Random(1)
+    old_data = mock_habbo_server.make_furnidata(scale["catalogue_size"])
+    new_data = copy.deepcopy(old_data)
+    room = new_data["roomitemtypes"]["furnitype"]
+    for item in rng.sample(room, len(room) // 100):
+        item["name"] += " (updated)"
+    for _ in range(len(room) // 200):
+        room.pop(rng.randrange(len(room)))
+    next_id = len(room) * 10
+    for i in range(len(room) // 200):
+        room.append({"id": next_id + i, "classname": f"room_new_{i}", "name": "New"})
+    rng.shuffle(room)
+    elapsed, diff = timed(furnidata.diff_furnidata, old_data, new_data)
+    return {"seconds": elapsed, **{kind: len(diff[kind]) for kind in ("added", "removed", "changed")}}
+
+def bench_text_diff(scale, args):
+    """
+    Diff per chiave di un file "chiave=valore" con l'1% di righe modificate e righe riordinate.
+    """
+    import keyvalue_diff
+
+    rng = random.Random(2)
+    old_text = mock_habbo_server.make_key_values(scale["text_size"])
+    lines = old_text.splitlines()
+    for i in rng.sample(range(len(lines)), len(lines) // 100):
+        lines[i] += " (updated)"
+    rng.shuffle(lines)
+    new_text = "\n".join(lines) + "\nsynthetic.key.new=1\n"
+    elapsed, diff = timed(keyvalue_diff.diff_texts, old_text, new_text)
+    return {"seconds": elapsed, **{kind: len(diff[kind]) for kind in ("added", "removed", "changed")}}
+
+BENCHMARKS = {
+    "update_stats": bench_update_stats,
+    "day_offsets": bench_day_offsets,
+    "furnidata_diff": bench_furnidata_diff,
+    "text_diff": bench_text_diff,
+}
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks against a local mock Habbo API.")
+    parser.add_argument("--scale", action="append", choices=sorted(SCALES), help="dataset size (repeatable, default: all)")
+    parser.add_argument("--benchmark", action="append", choices=sorted(BENCHMARKS), help="benchmark to run (repeatable, default: all)")
+    parser.add_argument("--latency", type=float, default=0.005, help="mock server latency per response (seconds)")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="probability of a 429 on marketplace requests (exercises the AIMD backoff)")
+    parser.add_argument("--concurrency", default="32", help="STATS_CONCURRENCY for the update_stats benchmark")
+    parser.add_argument("--rate", default="2000", help="STATS_RATE (initial requests/s) for the update_stats benchmark")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    args = parser.parse_args()
+
+    # Letti da update_stats e gamedata_cache all'import: vanno impostati prima
+    os.environ["STATS_CONCURRENCY"] = args.concurrency
+    os.environ["STATS_RATE"] = args.rate
+    cache_dir = tempfile.TemporaryDirectory()
+    os.environ["GAMEDATA_CACHE_DIR"] = cache_dir.name
+
+    results = []
+    for scale_name in args.scale or list(SCALES):
+        for name in args.benchmark or list(BENCHMARKS):
+            print(f"Running {name} ({scale_name})...", file=sys.stderr)
+            # I log degli script vengono scartati per non falsare i tempi
+            with open(os.devnull, "w") as devnull:
+                stdout = sys.stdout
+                sys.stdout = devnull
+                try:
+                    result = BENCHMARKS[name](SCALES[scale_name], args)
+                finally:
+                    sys.stdout = stdout
+            results.append({"benchmark": name, "scale": scale_name, **result})
+            print(json.dumps(results[-1]))
+    cache_dir.cleanup()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+import asyncio
+import threading
+import time
+
+import http_client
+import run_metrics
+
+# Limiti imposti da Discord per ogni messaggio inviato a un webhook
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_CHARS_PER_MESSAGE = 6000
+MAX_TITLE_LENGTH = 256
+MAX_DESCRIPTION_LENGTH = 4096
+
+# Numero massimo di tentativi per messaggio in caso di 429
+MAX_RETRIES = 5
+
+# Stato del rate limit per ciascun webhook: {webhook: {"remaining": int, "reset_at": float}}
+_buckets = {}
+_lock = threading.Lock()
+
+def embed_length(embed):
+    """
+    Numero di caratteri di un embed conteggiati da Discord per il limite per messaggio.
+    """
+    length = len(embed.get("title", "")) + len(embed.get("description", ""))
+    length += len(embed.get("footer", {}).get("text", "")) + len(embed.get("author", {}).get("name", ""))
+    for field in embed.get("fields", []):
+        length += len(field.get("name", "")) + len(field.get("value", ""))
+    return length
+
+def _fit_embed(embed):
+    """
+    Tronca titolo e descrizione di un embed ai limiti di Discord.
+    """
+    title = embed.get("title", "")
+    description = embed.get("description", "")
+    if len(title) <= MAX_TITLE_LENGTH and len(description) <= MAX_DESCRIPTION_LENGTH:
+        return embed
+    embed = dict(embed)
+    if len(title) > MAX_TITLE_LENGTH:
+        embed["title"] = title[:MAX_TITLE_LENGTH - 1] + "…"
+    if len(description) > MAX_DESCRIPTION_LENGTH:
+        embed["description"] = description[:MAX_DESCRIPTION_LENGTH - 1] + "…"
+    return embed
+
+def pack_embeds(embeds):
+    """
+    Raggruppa gli embed (in ordine) nel minor numero di messaggi che rispettano
+    i limiti di Discord: al massimo MAX_EMBEDS_PER_MESSAGE embed e
+    MAX_CHARS_PER_MESSAGE caratteri complessivi per messaggio.
+    """
+    batches = []
+    current = []
+    current_length = 0
+    for embed in embeds:
+        embed = _fit_embed(embed)
+        length = embed_length(embed)
+        if current and (len(current) >= MAX_EMBEDS_PER_MESSAGE or current_length + length > MAX_CHARS_PER_MESSAGE):
+            batches.append(current)
+            current = []
+            current_length = 0
+        current.append(embed)
+        current_length += length
+    if current:
+        batches.append(current)
+    return batches
+
+def _wait_for_bucket(webhook):
+    with _lock:
+        bucket = _buckets.get(webhook)
+        delay = 0
+        if bucket and bucket["remaining"] <= 0:
+            delay = bucket["reset_at"] - time.monotonic()
+    if delay > 0:
+        run_metrics.incr("discord_wait_seconds_total", delay)
+        time.sleep(delay)
+
+def _update_bucket(webhook, headers):
+    remaining = headers.get("X-RateLimit-Remaining")
+    reset_after = headers.get("X-RateLimit-Reset-After")
+    if remaining is None or reset_after is None:
+        return
+    try:
+        bucket = {"remaining": int(remaining), "reset_at": time.monotonic() + float(reset_after)}
+    except ValueError:
+        return
+    with _lock:
+        _buckets[webhook] = bucket
+
+def _retry_after(response):
+    try:
+        return float(response.json().get("retry_after"))
+    except Exception:
+        pass
+    try:
+        return float(response.headers.get("Retry-After", "1"))
+    except ValueError:
+        return 1.0
+
+def post_message(webhook, payload):
+    """
+    Invia un singolo messaggio al webhook rispettando gli header X-RateLimit-*
+    e ripetendo la richiesta dopo 'retry_after' in caso di 429.
+    Restituisce True se il messaggio è stato accettato.
+    """
+    for _ in range(MAX_RETRIES):
+        _wait_for_bucket(webhook)
+        try:
+            response = http_client.post(webhook, json=payload)
+        except Exception as e:
+            print(f"Error sending Discord notification: {e}")
+            return False
+        _update_bucket(webhook, response.headers)
+        if response.status_code == 429:
+            retry_after = _retry_after(response)
+            run_metrics.incr("discord_rate_limited_total")
+            run_metrics.incr("discord_wait_seconds_total", retry_after)
+            print(f"Discord rate limit hit. Retrying in {retry_after} seconds...")
+            time.sleep(retry_after)
+            continue
+        if response.status_code not in (200, 204):
+            print(f"Failed to send Discord notification: {response.status_code} {response.text}")
+            return False
+        run_metrics.incr("discord_messages_total")
+        return True
+    print("Max retries reached for Discord notification. Skipping...")
+    return False
+
+def send_embeds(webhook, embeds):
+    """
+    Invia tutti gli embed al webhook impacchettandoli nel minor numero di messaggi.
+    Restituisce il numero di messaggi consegnati.
+    """
+    if not webhook:
+        print("Discord webhook not set. Skipping notification.")
+        return 0
+    delivered = 0
+    for batch in pack_embeds(embeds):
+        if post_message(webhook, {"embeds": batch}):
+            delivered += 1
+    return delivered
+
+async def send_embeds_async(webhook, embeds):
+    """
+    Variante asincrona di send_embeds: l'invio (con le eventuali attese per il
+    rate limit) avviene in un thread, senza bloccare il loop asyncio.
+    """
+    return await asyncio.to_thread(send_embeds, webhook, embeds)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Esportazione della cronologia dei prezzi in formati tipizzati per l'analisi:
+  - CSV:     un file per giorno (csv/<data>.csv)
+  - SQLite:  tabella "records" con indici su classname e su date (stats.sqlite)
+  - Parquet: una partizione per giorno (parquet/date=<data>/records.parquet),
+             solo se pyarrow è installato
+L'esportazione è incrementale: il file di stato registra, per ogni formato,
+il numero di record esportati per ogni giorno e vengono scritti solo i giorni
+nuovi o cambiati (ad esempio completati in ritardo dagli items interrogati
+meno spesso o da un backfill). Lo store viene letto uno shard alla volta e
+in memoria restano solo i record dei giorni che possono cambiare (quelli
+ancora restituiti dall'API) o non ancora esportati.
+Viene eseguita al termine di update_stats; in CI la directory delle
+esportazioni (con lo stato) è conservata nella cache del workflow.
+"""
+import argparse
+import csv
+import datetime
+import json
+import os
+import sqlite3
+import time
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+import history_store
+import hotels
+
+# Colonne esportate, con il tipo SQLite
+COLUMNS = (
+    ("classname", "TEXT"),
+    ("date", "TEXT"),
+    ("statsDate", "TEXT"),
+    ("averagePrice", "INTEGER"),
+    ("totalSoldItems", "INTEGER"),
+    ("totalCreditSum", "INTEGER"),
+    ("totalOpenOffers", "INTEGER"),
+)
+
+# Formati disponibili
+FORMATS = ("csv", "sqlite", "parquet")
+
+STATE_FILE = "export_state.json"
+SQLITE_FILE = "stats.sqlite"
+
+def load_state(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(path, state):
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, path)
+
+def rows_by_date(shards, wanted):
+    """
+    Raggruppa per giorno i record degli shard ('shards': iterabile di
+    dizionari classname -> record, vedi history_store.iter_shards), tenendo
+    solo i giorni per cui wanted(data ISO) è vero.
+    Restituisce data ISO -> lista di tuple nell'ordine di COLUMNS, ordinate per classname.
+    """
+    by_date = {}
+    for shard in shards:
+        for classname, history in shard.items():
+            for record in history:
+                day = history_store.record_date(record).isoformat()
+                if not wanted(day):
+                    continue
+                by_date.setdefault(day, []).append((
+                    classname,
+                    day,
+                    record.get("statsDate", day),
+                    int(record.get("averagePrice", "0")),
+                    int(record.get("totalSoldItems", "0")),
+                    int(record.get("totalCreditSum", "0")),
+                    int(record.get("totalOpenOffers", "0")),
+                ))
+    for rows in by_date.values():
+        rows.sort()
+    return by_date
+
+def pending_dates(by_date, exported):
+    """
+    Giorni da (ri)esportare: quelli assenti da 'exported' (data -> numero di
+    record esportati) o con un numero di record diverso.
+    """
+    return sorted(day for day, rows in by_date.items() if exported.get(day) != len(rows))
+
+def write_csv(exports_dir, day, rows):
+    directory = os.path.join(exports_dir, "csv")
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{day}.csv")
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(name for name, _ in COLUMNS)
+        writer.writerows(rows)
+    os.replace(tmp_file, path)
+
+def write_parquet(exports_dir, day, rows):
+    directory = os.path.join(exports_dir, "parquet", f"date={day}")
+    os.makedirs(directory, exist_ok=True)
+    types = {"TEXT": pyarrow.string(), "INTEGER": pyarrow.int64()}
+    schema = pyarrow.schema([(name, types[sql_type]) for name, sql_type in COLUMNS])
+    columns = list(zip(*rows))
+    table = pyarrow.Table.from_arrays([pyarrow.array(column, type=field.type) for column, field in zip(columns, schema)], schema=schema)
+    path = os.path.join(directory, "records.parquet")
+    pyarrow.parquet.write_table(table, path + ".tmp")
+    os.replace(path + ".tmp", path)
+
+def open_database(path):
+    connection = sqlite3.connect(path)
+    columns = ", ".join(f"{name} {sql_type} NOT NULL" for name, sql_type in COLUMNS)
+    connection.execute(f"CREATE TABLE IF NOT EXISTS records ({columns}, PRIMARY KEY (classname, date))")
+    connection.execute("CREATE INDEX IF NOT EXISTS records_date ON records (date)")
+    return connection
+
+def write_sqlite(connection, day, rows):
+    """
+    Sostituisce i record del giorno 'day'. La chiave primaria (classname, date)
+    fa da indice per classname.
+    """
+    connection.execute("DELETE FROM records WHERE date = ?", (day,))
+    placeholders = ", ".join("?" for _ in COLUMNS)
+    connection.executemany(f"INSERT OR REPLACE INTO records VALUES ({placeholders})", rows)
+
+def export(exports_dir, current_date, store_dir=history_store.STORE_DIR, legacy_file=history_store.LEGACY_FILE, formats=FORMATS):
+    """
+    Esporta in 'exports_dir', per ciascun formato, i giorni nuovi o cambiati
+    dall'ultima esportazione in quel formato. I giorni precedenti alla
+    finestra dell'API (HISTORY_LIMIT giorni prima di 'current_date') non
+    cambiano più: se già esportati in tutti i formati non vengono riletti.
+    Lo stato di un giorno viene aggiornato subito dopo averlo scritto (per
+    SQLite a transazione confermata), così un'esportazione interrotta
+    riprende da dove si era fermata.
+    Restituisce l'elenco ordinato dei giorni scritti in almeno un formato.
+    """
+    os.makedirs(exports_dir, exist_ok=True)
+    state_path = os.path.join(exports_dir, STATE_FILE)
+    state = load_state(state_path)
+    if "parquet" in formats and pyarrow is None:
+        print("pyarrow not installed. Skipping Parquet export.")
+        formats = tuple(name for name in formats if name != "parquet")
+    window_start = (current_date - datetime.timedelta(days=history_store.HISTORY_LIMIT)).isoformat()
+
+    def wanted(day):
+        return day >= window_start or any(day not in state.get(name, {}) for name in formats)
+
+    by_date = rows_by_date(history_store.iter_shards(store_dir, legacy_file), wanted)
+    written = set()
+    for name in formats:
+        exported = state.setdefault(name, {})
+        days = pending_dates(by_date, exported)
+        connection = open_database(os.path.join(exports_dir, SQLITE_FILE)) if name == "sqlite" and days else None
+        try:
+            for day in days:
+                rows = by_date[day]
+                if name == "csv":
+                    write_csv(exports_dir, day, rows)
+                elif name == "parquet":
+                    write_parquet(exports_dir, day, rows)
+                else:
+                    with connection:
+                        write_sqlite(connection, day, rows)
+                exported[day] = len(rows)
+                save_state(state_path, state)
+        finally:
+            if connection is not None:
+                connection.close()
+        written.update(days)
+    return sorted(written)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the price history to CSV, SQLite and Parquet, appending only new days.")
+    parser.add_argument("--hotel", default=hotels.DEFAULT_HOTEL, choices=sorted(hotels.HOTELS))
+    parser.add_argument("--format", action="append", choices=FORMATS, help="output format (repeatable, default: all)")
+    parser.add_argument("--full", action="store_true", help="export every day again, ignoring the export state")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    paths = hotels.output_paths(args.hotel)
+    if args.full and os.path.exists(os.path.join(paths["exports_dir"], STATE_FILE)):
+        os.remove(os.path.join(paths["exports_dir"], STATE_FILE))
+    days = export(paths["exports_dir"], datetime.date.today(), paths["store_dir"], paths["legacy_file"], tuple(args.format or FORMATS))
+    elapsed = time.perf_counter() - start
+    if days:
+        print(f"Exported {len(days)} days ({days[0]} to {days[-1]}) to {paths['exports_dir']} in {elapsed:.2f} s.")
+    else:
+        print(f"Exports in {paths['exports_dir']} already up to date.")
+
+if __name__ == "__main__":
+    main()
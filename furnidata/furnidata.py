@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 import os
+import sys
 import json
-import datetime
-import requests
-import re
-from deepdiff import DeepDiff
+
+# Rende importabili i moduli condivisi nella root del repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import furnidata_lifecycle
+import gamedata_cache
+import monitor
 
 # URL del furnidata
 FURNIDATA_URL = "https://www.habbo.it/gamedata/furnidata_json/0"
@@ -18,14 +21,8 @@ DISCORD_WEBHOOK = os.environ.get("DISCORD_WEBHOOK")
 
 MAX_LENGTH = 1900  # Lunghezza massima per la descrizione degli embed
 
-def download_furnidata():
-    try:
-        response = requests.get(FURNIDATA_URL, timeout=10)
-        response.raise_for_status()
-        return response.json()
-    except Exception as e:
-        print(f"Error downloading furnidata: {e}")
-        return None
+# Sezioni del furnidata confrontate dal diff
+SECTIONS = ("roomitemtypes", "wallitemtypes")
 
 def load_local_furnidata():
     if os.path.exists(LOCAL_FILE):
@@ -37,19 +34,6 @@ def save_local_furnidata(data):
     with open(LOCAL_FILE, "w", encoding="utf-8") as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
 
-def send_discord_embeds(embeds):
-    if not DISCORD_WEBHOOK:
-        print("DISCORD_WEBHOOK not set. Skipping Discord notification.")
-        return
-    for embed in embeds:
-        payload = {"embeds": [embed]}
-        try:
-            response = requests.post(DISCORD_WEBHOOK, json=payload)
-            if response.status_code not in (200, 204):
-                print(f"Failed to send Discord notification: {response.status_code} {response.text}")
-        except Exception as e:
-            print(f"Error sending Discord notification: {e}")
-
 def split_text_into_chunks(text, max_length=MAX_LENGTH):
     """
     Suddivide il testo in chunk, senza spezzare le righe.
@@ -70,26 +54,49 @@ def split_text_into_chunks(text, max_length=MAX_LENGTH):
         chunks.append(current_chunk)
     return chunks
 
-# --- Helper per il parsing dei path DeepDiff ---
-def parse_diff_path(diff_path):
+# --- Diff per chiave dei furnitype ---
+def item_key(item):
     """
-    Converte una stringa tipo
-    "root['roomitemtypes']['furnitype'][14853]['name']"
-    in una lista di chiavi: ["roomitemtypes", "furnitype", 14853, "name"]
+    Chiave univoca di un furnitype all'interno della sua sezione: l'id,
+    oppure il classname se l'id manca.
     """
-    pattern = re.compile(r"\['([^']+)'\]|\[(\d+)\]")
-    keys = []
-    for match in pattern.finditer(diff_path):
-        if match.group(1) is not None:
-            keys.append(match.group(1))
-        elif match.group(2) is not None:
-            keys.append(int(match.group(2)))
-    return keys
-
-def get_by_path(data, keys):
-    for key in keys:
-        data = data[key]
-    return data
+    return item.get("id", item.get("classname"))
+
+def index_furnitypes(data, section):
+    return {item_key(item): item for item in data.get(section, {}).get("furnitype", [])}
+
+def diff_furnidata(old_data, new_data):
+    """
+    Confronta due furnidata indicizzando i furnitype di ogni sezione per id
+    e confrontando gli oggetti campo per campo (tempo lineare).
+    Restituisce un dizionario con:
+      - "added":   lista di (sezione, nuovo oggetto)
+      - "removed": lista di (sezione, vecchio oggetto)
+      - "changed": lista di (sezione, vecchio oggetto, nuovo oggetto, modifiche)
+        dove modifiche è {campo: {"old": ..., "new": ...}}
+    """
+    diff = {"added": [], "removed": [], "changed": []}
+    for section in SECTIONS:
+        old_index = index_furnitypes(old_data, section)
+        for new_obj in new_data.get(section, {}).get("furnitype", []):
+            old_obj = old_index.pop(item_key(new_obj), None)
+            if old_obj is None:
+                diff["added"].append((section, new_obj))
+                continue
+            if old_obj == new_obj:
+                continue
+            modifications = {}
+            for field in list(new_obj) + [key for key in old_obj if key not in new_obj]:
+                if old_obj.get(field) != new_obj.get(field):
+                    modifications[field] = {"old": old_obj.get(field), "new": new_obj.get(field)}
+            diff["changed"].append((section, old_obj, new_obj, modifications))
+        # Gli oggetti rimasti nell'indice non esistono più nel nuovo furnidata
+        for old_obj in old_index.values():
+            diff["removed"].append((section, old_obj))
+    return diff
+
+def has_changes(diff):
+    return any(diff[kind] for kind in ("added", "removed", "changed"))
 
 # --- Funzioni per generare il diff formattato in stile "diff" per Discord ---
 def generate_object_diff(old_obj, new_obj, modifications):
@@ -135,29 +142,31 @@ def generate_new_object_diff(new_obj):
     lines.append("}")
     return "\n".join(lines)
 
-def send_discord_diff_notification(diff, local_data, new_data):
+def generate_removed_object_diff(old_obj):
+    """
+    Genera la rappresentazione completa di un oggetto rimosso, con ogni riga
+    preceduta dal segno "-".
+    """
+    lines = []
+    lines.append("{")
+    for key, value in old_obj.items():
+        line = f'- {json.dumps(key)}: {json.dumps(value)},'
+        lines.append("  " + line)
+    lines.append("}")
+    return "\n".join(lines)
+
+def build_diff_embeds(diff):
+    """
+    Costruisce gli embed Discord (nuovi, rimossi, modificati) per il diff,
+    suddividendo le descrizioni più lunghe di MAX_LENGTH.
+    """
+    print(f"Furnidata changes detected: {len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['changed'])} changed.")
+    for section, old_obj, new_obj, modifications in diff["changed"]:
+        print(f"  {section} {new_obj.get('classname')}: {', '.join(sorted(modifications))}")
     embeds = []
     
     # --- Gestione dei nuovi oggetti ---
-    new_objects = {}
-    if "dictionary_item_added" in diff:
-        for path in diff["dictionary_item_added"]:
-            keys = parse_diff_path(path)
-            try:
-                new_obj = get_by_path(new_data, keys)
-                new_objects[tuple(keys)] = new_obj
-            except Exception as e:
-                print(f"Error retrieving new object for path {path}: {e}")
-    if "iterable_item_added" in diff:
-        for path in diff["iterable_item_added"]:
-            keys = parse_diff_path(path)
-            try:
-                new_obj = get_by_path(new_data, keys)
-                new_objects[tuple(keys)] = new_obj
-            except Exception as e:
-                print(f"Error retrieving new iterable item for path {path}: {e}")
-                
-    for parent, new_obj in new_objects.items():
+    for section, new_obj in diff["added"]:
         diff_str = "```diff\n" + generate_new_object_diff(new_obj) + "\n```"
         embed = {
             "title": "Furnidata New Object",
@@ -165,28 +174,19 @@ def send_discord_diff_notification(diff, local_data, new_data):
             "color": 65280  # verde
         }
         embeds.append(embed)
+
+    # --- Gestione degli oggetti rimossi ---
+    for section, old_obj in diff["removed"]:
+        diff_str = "```diff\n" + generate_removed_object_diff(old_obj) + "\n```"
+        embed = {
+            "title": "Furnidata Removed Object",
+            "description": diff_str,
+            "color": 16711680  # rosso
+        }
+        embeds.append(embed)
     
     # --- Gestione delle modifiche ---
-    modifications_by_parent = {}
-    if "values_changed" in diff:
-        for path, change in diff["values_changed"].items():
-            keys = parse_diff_path(path)
-            parent = tuple(keys[:-1])
-            field = keys[-1]
-            modifications_by_parent.setdefault(parent, {})[field] = {
-                "old": change["old_value"],
-                "new": change["new_value"]
-            }
-    
-    for parent, modifications in modifications_by_parent.items():
-        try:
-            old_obj = get_by_path(local_data, list(parent))
-        except Exception as e:
-            old_obj = {}
-        try:
-            new_obj = get_by_path(new_data, list(parent))
-        except Exception as e:
-            new_obj = {}
+    for section, old_obj, new_obj, modifications in diff["changed"]:
         diff_representation = generate_object_diff(old_obj, new_obj, modifications)
         diff_str = "```diff\n" + diff_representation + "\n```"
         embed = {
@@ -196,55 +196,39 @@ def send_discord_diff_notification(diff, local_data, new_data):
         }
         embeds.append(embed)
     
-    if embeds:
-        # Se il testo supera MAX_LENGTH lo suddividiamo
-        final_embeds = []
-        for embed in embeds:
-            if len(embed["description"]) > MAX_LENGTH:
-                chunks = split_text_into_chunks(embed["description"], max_length=MAX_LENGTH)
-                for chunk in chunks:
-                    final_embeds.append({
-                        "title": embed["title"],
-                        "description": chunk,
-                        "color": embed["color"]
-                    })
-            else:
-                final_embeds.append(embed)
-        send_discord_embeds(final_embeds)
-    else:
-        send_discord_embeds([{
-            "title": "Furnidata Check",
-            "description": f"No changes detected as of {datetime.datetime.now().isoformat()}",
-            "color": 3447003  # blu
-        }])
+    # Se il testo supera MAX_LENGTH lo suddividiamo
+    final_embeds = []
+    for embed in embeds:
+        if len(embed["description"]) > MAX_LENGTH:
+            chunks = split_text_into_chunks(embed["description"], max_length=MAX_LENGTH)
+            for chunk in chunks:
+                final_embeds.append({
+                    "title": embed["title"],
+                    "description": chunk,
+                    "color": embed["color"]
+                })
+        else:
+            final_embeds.append(embed)
+    return final_embeds
+
+SOURCE = monitor.make_source(
+    name="furnidata",
+    label="Furnidata",
+    url=FURNIDATA_URL,
+    webhook=DISCORD_WEBHOOK,
+    load_local=load_local_furnidata,
+    save_local=save_local_furnidata,
+    parse=gamedata_cache.read_json,
+    differ=diff_furnidata,
+    has_changes=has_changes,
+    render=build_diff_embeds,
+    local_file=LOCAL_FILE,
+    on_update=furnidata_lifecycle.record_update,
+)
 
 def main():
-    new_data = download_furnidata()
-    if new_data is None:
+    if not monitor.run_sources([SOURCE]):
         print("Failed to download new furnidata.")
-        return
-
-    local_data = load_local_furnidata()
-    if local_data is None:
-        # Primo avvio: salva lo snapshot iniziale e invia una notifica
-        save_local_furnidata(new_data)
-        message = f"Initial furnidata snapshot saved on {datetime.datetime.now().isoformat()}."
-        print(message)
-        send_discord_embeds([{
-            "title": "Initial Furnidata Snapshot",
-            "description": message,
-            "color": 3447003  # blu
-        }])
-        return
-
-    diff = DeepDiff(local_data, new_data, ignore_order=True)
-    if diff:
-        send_discord_diff_notification(diff, local_data, new_data)
-        print("Furnidata changes detected:")
-        print(json.dumps(diff, indent=2))
-        save_local_furnidata(new_data)
-    else:
-        print(f"No changes in furnidata as of {datetime.datetime.now().isoformat()}.")
 
 if __name__ == "__main__":
     main()
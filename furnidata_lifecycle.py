@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Indice del ciclo di vita dei furnitype, aggiornato ad ogni modifica del furnidata.
+
+Per ogni classname vengono registrati:
+  - "section":   roomitemtypes / wallitemtypes
+  - "intervals": periodi di presenza nel catalogo [inizio, fine] (fine None se ancora presente)
+  - "fields":    valori correnti (o gli ultimi noti) dei campi
+  - "events":    modifiche dei campi [istante, campo, vecchio valore, nuovo valore],
+                 con ABSENT al posto del valore di un campo aggiunto o rimosso
+Gli istanti sono timestamp ISO. Il catalogo a una certa data si ottiene
+partendo dai valori correnti e annullando gli eventi successivi, senza
+rileggere gli snapshot passati.
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+
+# File dell'indice (versionato insieme allo snapshot del furnidata)
+LIFECYCLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "furnidata", "lifecycle.json")
+
+# Sezioni del furnidata
+SECTIONS = ("roomitemtypes", "wallitemtypes")
+
+# Valore di un campo assente negli eventi, distinto da un valore JSON null
+ABSENT = {"$absent": True}
+
+def _empty_index():
+    return {"tracking_since": None, "updated_at": None, "items": {}}
+
+def load_lifecycle(path=LIFECYCLE_FILE):
+    if not os.path.exists(path):
+        return _empty_index()
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_lifecycle(index, path=LIFECYCLE_FILE):
+    """
+    Salva l'indice con una riga per classname, per diff git leggibili.
+    """
+    header = {"tracking_since": index["tracking_since"], "updated_at": index["updated_at"]}
+    lines = [
+        f"{json.dumps(classname, ensure_ascii=False)}:{json.dumps(entry, ensure_ascii=False, separators=(',', ':'))}"
+        for classname, entry in sorted(index["items"].items())
+    ]
+    text = json.dumps(header)[:-1] + ',"items":{\n' + ",\n".join(lines) + "\n}}\n"
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+
+def _fields(item):
+    return {key: value for key, value in item.items() if key != "classname"}
+
+def _record_fields(entry, item, timestamp):
+    """
+    Aggiorna i valori dei campi di 'entry' con quelli di 'item', registrando
+    un evento per ogni campo cambiato (anche aggiunto o rimosso).
+    """
+    new_fields = _fields(item)
+    old_fields = entry["fields"]
+    for field in list(new_fields) + [key for key in old_fields if key not in new_fields]:
+        old_value = old_fields.get(field, ABSENT)
+        new_value = new_fields.get(field, ABSENT)
+        if old_value != new_value:
+            entry["events"].append([timestamp, field, old_value, new_value])
+    entry["fields"] = new_fields
+
+def mark_present(index, section, item, timestamp):
+    """
+    Registra la presenza di 'item' da 'timestamp': nuovo classname, ritorno
+    nel catalogo dopo una rimozione o semplice aggiornamento dei campi.
+    """
+    classname = item.get("classname")
+    if not classname:
+        return
+    entry = index["items"].get(classname)
+    if entry is None:
+        index["items"][classname] = {
+            "section": section,
+            "intervals": [[timestamp, None]],
+            "fields": _fields(item),
+            "events": [],
+        }
+        return
+    if entry["intervals"][-1][1] is not None:
+        entry["intervals"].append([timestamp, None])
+    entry["section"] = section
+    _record_fields(entry, item, timestamp)
+
+def mark_removed(index, item, timestamp):
+    entry = index["items"].get(item.get("classname"))
+    if entry is not None and entry["intervals"][-1][1] is None:
+        entry["intervals"][-1][1] = timestamp
+
+def bootstrap(index, data, timestamp):
+    """
+    Inizializza l'indice con tutti gli oggetti di un furnidata. La loro
+    comparsa effettiva è precedente: "tracking_since" indica da quando
+    l'indice segue il catalogo.
+    """
+    for section in SECTIONS:
+        for item in data.get(section, {}).get("furnitype", []):
+            mark_present(index, section, item, timestamp)
+    index["tracking_since"] = timestamp
+    index["updated_at"] = timestamp
+
+def apply_diff(index, diff, timestamp):
+    """
+    Applica un diff di furnidata.diff_furnidata. Un cambio di classname
+    chiude il periodo del vecchio nome e ne apre uno per il nuovo.
+    """
+    for section, old_obj, new_obj, modifications in diff["changed"]:
+        if "classname" in modifications:
+            mark_removed(index, old_obj, timestamp)
+        mark_present(index, section, new_obj, timestamp)
+    for section, new_obj in diff["added"]:
+        mark_present(index, section, new_obj, timestamp)
+    for section, old_obj in diff["removed"]:
+        mark_removed(index, old_obj, timestamp)
+    index["updated_at"] = timestamp
+
+def record_update(old_data, new_data, diff, timestamp=None, path=LIFECYCLE_FILE):
+    """
+    Aggiorna l'indice su disco dopo un'esecuzione del monitor del furnidata.
+    'diff' è None per lo snapshot iniziale; se l'indice è vuoto viene prima
+    inizializzato con il furnidata precedente (o con quello nuovo).
+    """
+    timestamp = timestamp or datetime.datetime.now().isoformat(timespec="seconds")
+    index = load_lifecycle(path)
+    if not index["items"]:
+        bootstrap(index, old_data if old_data is not None else new_data, timestamp)
+    if diff is not None:
+        apply_diff(index, diff, timestamp)
+    save_lifecycle(index, path)
+    return index
+
+def _instant(when):
+    """
+    Una data (YYYY-MM-DD) indica la fine di quel giorno.
+    """
+    return when + "T23:59:59" if len(when) == 10 else when
+
+def _present(entry, instant):
+    return any(start <= instant and (end is None or end > instant) for start, end in entry["intervals"])
+
+def fields_as_of(entry, instant):
+    """
+    Valori dei campi all'istante 'instant', annullando gli eventi successivi.
+    """
+    fields = dict(entry["fields"])
+    for timestamp, field, old_value, _ in reversed(entry["events"]):
+        if timestamp <= instant:
+            break
+        if old_value == ABSENT:
+            fields.pop(field, None)
+        else:
+            fields[field] = old_value
+    return fields
+
+def catalogue_as_of(index, when):
+    """
+    Catalogo alla data o all'istante 'when': lista di {"classname", "section", ...campi}.
+    """
+    instant = _instant(when)
+    return [
+        {"classname": classname, "section": entry["section"], **fields_as_of(entry, instant)}
+        for classname, entry in sorted(index["items"].items())
+        if _present(entry, instant)
+    ]
+
+def item_history(index, classname):
+    """
+    Ciclo di vita di un classname (None se mai visto): prima e ultima presenza
+    (l'ultimo aggiornamento dell'indice se è ancora nel catalogo), periodi
+    nel catalogo ed eventi di modifica ("added", "removed" o "modified").
+    """
+    entry = index["items"].get(classname)
+    if entry is None:
+        return None
+    events = []
+    for timestamp, field, old_value, new_value in entry["events"]:
+        event = {"timestamp": timestamp, "field": field}
+        if old_value == ABSENT:
+            event.update(change="added", new=new_value)
+        elif new_value == ABSENT:
+            event.update(change="removed", old=old_value)
+        else:
+            event.update(change="modified", old=old_value, new=new_value)
+        events.append(event)
+    removed_at = entry["intervals"][-1][1]
+    return {
+        "classname": classname,
+        "section": entry["section"],
+        "present": removed_at is None,
+        "first_seen": entry["intervals"][0][0],
+        "last_seen": removed_at or index["updated_at"],
+        "intervals": entry["intervals"],
+        "events": events,
+        "fields": entry["fields"],
+    }
+
+def rebuild_from_archive(path=LIFECYCLE_FILE):
+    """
+    Ricostruisce l'indice ripercorrendo le versioni del furnidata salvate in
+    snapshot_archive, usando come istante la data di archiviazione.
+    """
+    import snapshot_archive
+    from furnidata import furnidata
+
+    index = _empty_index()
+    previous = None
+    for entry in snapshot_archive.load_manifest("furnidata"):
+        data = json.loads(snapshot_archive.read_object("furnidata", entry["sha256"]))
+        timestamp = entry["saved_at"][:19]
+        if previous is None:
+            bootstrap(index, data, timestamp)
+        else:
+            apply_diff(index, furnidata.diff_furnidata(previous, data), timestamp)
+        previous = data
+    save_lifecycle(index, path)
+    return index
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the furnidata lifecycle index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    history_parser = subparsers.add_parser("history", help="lifecycle of a classname")
+    history_parser.add_argument("classname")
+    catalogue_parser = subparsers.add_parser("catalogue", help="catalogue as of a date (YYYY-MM-DD) or ISO timestamp")
+    catalogue_parser.add_argument("when")
+    catalogue_parser.add_argument("--count", action="store_true", help="print only the number of items")
+    subparsers.add_parser("rebuild", help="rebuild the index from the snapshot archive")
+    args = parser.parse_args()
+
+    if args.command == "rebuild":
+        index = rebuild_from_archive()
+        print(f"Rebuilt lifecycle index with {len(index['items'])} classnames.")
+        return
+    index = load_lifecycle()
+    if args.command == "history":
+        history = item_history(index, args.classname)
+        if history is None:
+            raise SystemExit(f"{args.classname} not found in the lifecycle index.")
+        print(json.dumps(history, indent=2, ensure_ascii=False))
+    else:
+        catalogue = catalogue_as_of(index, args.when)
+        if args.count:
+            print(len(catalogue))
+        else:
+            for item in catalogue:
+                print(json.dumps(item, ensure_ascii=False))
+        if index["tracking_since"] and _instant(args.when) < index["tracking_since"]:
+            print(f"Warning: the index only tracks the catalogue since {index['tracking_since']}.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+import codecs
+import json
+import re
+
+# Dimensione dei chunk letti dalla sorgente
+CHUNK_SIZE = 64 * 1024
+
+# Inizio di un array di furnitype: "roomitemtypes": {"furnitype": [
+SECTION_PATTERN = re.compile(r'"(roomitemtypes|wallitemtypes)"\s*:\s*\{\s*"furnitype"\s*:\s*\[')
+
+# Caratteri conservati quando si cerca l'inizio di una sezione (per non perdere
+# un'intestazione spezzata tra due chunk)
+SECTION_LOOKBEHIND = 128
+
+_decoder = json.JSONDecoder()
+
+def iter_furnitypes(chunks):
+    """
+    Analizza in modo incrementale un furnidata JSON fornito come iterabile di
+    chunk di bytes e restituisce (sezione, furnitype) man mano che ogni oggetto
+    è completo. In memoria resta solo la parte non ancora analizzata, quindi
+    il consumo è limitato dalla dimensione del chunk e del singolo oggetto.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    section = None
+    eof = False
+
+    def read_more():
+        nonlocal buffer, pos, eof
+        chunk = next(chunks, None)
+        if chunk is None:
+            eof = True
+            buffer = buffer[pos:] + decoder.decode(b"", final=True)
+        else:
+            buffer = buffer[pos:] + decoder.decode(chunk)
+        pos = 0
+
+    while True:
+        if section is None:
+            match = SECTION_PATTERN.search(buffer, pos)
+            if match:
+                section = match.group(1)
+                pos = match.end()
+                continue
+            if eof:
+                return
+            pos = max(pos, len(buffer) - SECTION_LOOKBEHIND)
+            read_more()
+            continue
+
+        # All'interno dell'array: salta separatori e spazi
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos == len(buffer):
+            if eof:
+                raise ValueError(f"Unexpected end of furnidata inside {section}")
+            read_more()
+            continue
+        if buffer[pos] == "]":
+            section = None
+            pos += 1
+            continue
+        try:
+            item, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Oggetto incompleto: servono altri bytes
+            if eof:
+                raise
+            read_more()
+            continue
+        pos = end
+        yield section, item
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import datetime
+import hashlib
+import json
+import os
+import threading
+from urllib.parse import urlsplit
+
+import http_client
+import run_metrics
+
+# Directory della cache locale (condivisa da tutti gli script)
+CACHE_DIR = os.environ.get(
+    "GAMEDATA_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".gamedata_cache"),
+)
+
+# Dimensione dei chunk usati per scaricare e rileggere le risorse
+CHUNK_SIZE = 64 * 1024
+
+_lock = threading.Lock()
+
+def _cache_paths(url):
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    return os.path.join(CACHE_DIR, key + ".body"), os.path.join(CACHE_DIR, key + ".json")
+
+def _load_meta(meta_path):
+    if not os.path.exists(meta_path):
+        return {}
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Error reading cache metadata {meta_path}, ignoring it: {e}")
+        return {}
+
+def _save_meta(meta_path, meta):
+    tmp_file = f"{meta_path}.{os.getpid()}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_file, meta_path)
+
+def fetch(url):
+    """
+    Scarica 'url' usando la cache su disco. Se la risorsa è già in cache
+    viene inviata una richiesta condizionale (If-None-Match / If-Modified-Since):
+    una risposta 304 non scarica nulla. Il contenuto viene salvato in streaming
+    e identificato dal suo sha256.
+    Restituisce un dizionario con:
+      - "url", "path" (file locale con il contenuto), "sha256"
+      - "changed": False se il contenuto è identico alla versione in cache
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    body_path, meta_path = _cache_paths(url)
+    with _lock:
+        meta = _load_meta(meta_path)
+    headers = {}
+    if meta and os.path.exists(body_path):
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    now = datetime.datetime.now().isoformat()
+    with http_client.get(url, headers=headers, stream=True) as response:
+        if response.status_code == 304:
+            meta["checked_at"] = now
+            with _lock:
+                _save_meta(meta_path, meta)
+            run_metrics.incr("gamedata_requests_total", result="not_modified")
+            print(f"Gamedata not modified (304): {url}")
+            return {"url": url, "path": body_path, "sha256": meta["sha256"], "changed": False}
+        response.raise_for_status()
+        digest = hashlib.sha256()
+        # Nome temporaneo per processo: più processi (es. hotel diversi) possono condividere la cache
+        tmp_file = f"{body_path}.{os.getpid()}.tmp"
+        with open(tmp_file, "wb") as f:
+            for chunk in response.iter_content(CHUNK_SIZE):
+                digest.update(chunk)
+                f.write(chunk)
+                run_metrics.incr("http_response_bytes_total", len(chunk), host=urlsplit(response.url).hostname or "")
+        os.replace(tmp_file, body_path)
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+
+    sha256 = digest.hexdigest()
+    changed = sha256 != meta.get("sha256")
+    with _lock:
+        meta = _load_meta(meta_path)
+        meta.update({
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "sha256": sha256,
+            "size": os.path.getsize(body_path),
+            "fetched_at": now,
+            "checked_at": now,
+        })
+        _save_meta(meta_path, meta)
+    run_metrics.incr("gamedata_requests_total", result="changed" if changed else "unchanged")
+    print(f"Gamedata downloaded ({'changed' if changed else 'unchanged'}): {url}")
+    return {"url": url, "path": body_path, "sha256": sha256, "changed": changed}
+
+def is_processed(resource, consumer):
+    """
+    True se 'consumer' ha già elaborato esattamente questo contenuto
+    (stesso sha256): in tal caso non serve rileggerlo né analizzarlo.
+    """
+    _, meta_path = _cache_paths(resource["url"])
+    with _lock:
+        meta = _load_meta(meta_path)
+    return meta.get("consumers", {}).get(consumer) == resource["sha256"]
+
+def mark_processed(resource, consumer):
+    """
+    Registra che 'consumer' ha elaborato il contenuto corrente della risorsa.
+    """
+    _, meta_path = _cache_paths(resource["url"])
+    with _lock:
+        meta = _load_meta(meta_path)
+        meta.setdefault("consumers", {})[consumer] = resource["sha256"]
+        _save_meta(meta_path, meta)
+
+def iter_chunks(resource):
+    with open(resource["path"], "rb") as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+def read_text(resource):
+    with open(resource["path"], "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+def read_json(resource):
+    with open(resource["path"], "r", encoding="utf-8") as f:
+        return json.load(f)
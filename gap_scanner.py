@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+import argparse
+import datetime
+import json
+import os
+import statistics
+
+import history_store
+import hotels
+import poll_scheduler
+
+# Un giorno è considerato mancante se ha meno di GAP_RATIO volte il numero
+# mediano di record dei giorni raccolti (es. esecuzione fallita o interrotta)
+GAP_RATIO = float(os.environ.get("GAP_RATIO", "0.25"))
+
+def daily_record_counts(all_stats):
+    """
+    Numero di record (items scambiati) per ciascun giorno della cronologia.
+    """
+    counts = {}
+    for history in all_stats.values():
+        for record in history:
+            day = history_store.record_date(record)
+            counts[day] = counts.get(day, 0) + 1
+    return counts
+
+def window_start(current_date):
+    """
+    Primo giorno ancora restituito dall'API (che copre gli ultimi HISTORY_LIMIT giorni).
+    """
+    return current_date - datetime.timedelta(days=history_store.HISTORY_LIMIT)
+
+def missing_dates(all_stats, current_date):
+    """
+    Giorni (fino a ieri) con meno di GAP_RATIO volte il numero mediano di
+    record: su migliaia di items ogni giorno ha degli scambi, quindi un giorno
+    quasi vuoto indica dati non raccolti per tutto il catalogo.
+    La mediana è calcolata solo sui giorni con record: includendo i giorni
+    vuoti, un'interruzione più lunga di metà della cronologia porterebbe la
+    mediana a zero e non verrebbe segnalata.
+    Restituisce una lista di {"date", "records", "recoverable"}.
+    """
+    counts = daily_record_counts(all_stats)
+    if not counts:
+        return []
+    first = min(counts)
+    last = current_date - datetime.timedelta(days=1)
+    days = [first + datetime.timedelta(days=i) for i in range((last - first).days + 1)]
+    if not days:
+        return []
+    threshold = GAP_RATIO * statistics.median(counts.values())
+    start = window_start(current_date)
+    return [
+        {"date": day.isoformat(), "records": counts.get(day, 0), "recoverable": day >= start}
+        for day in days
+        if counts.get(day, 0) < threshold
+    ]
+
+def overdue_items(all_stats, poll_state, current_date):
+    """
+    Items interrogati meno spesso di quanto previsto dal loro livello di
+    polling (fetch falliti, 429, esecuzioni interrotte). I giorni non ancora
+    raccolti vanno dall'ultimo fetch riuscito a ieri; quelli ormai fuori dalla
+    finestra dell'API sono persi definitivamente.
+    Per gli items assenti dallo stato del polling (cronologia precedente allo
+    scheduler) l'ultimo fetch è lo statsDate dell'ultimo record (vedi
+    poll_scheduler.coverage_date).
+    """
+    start = window_start(current_date)
+    overdue = []
+    for classname in sorted(all_stats.keys() | poll_state.keys()):
+        history = all_stats.get(classname, [])
+        coverage = poll_scheduler.coverage_date(history, poll_state.get(classname))
+        if coverage is None:
+            continue
+        tier = poll_scheduler.classify(history, current_date)
+        uncollected = (current_date - coverage).days
+        if uncollected <= poll_scheduler.POLL_INTERVALS[tier]:
+            continue
+        overdue.append({
+            "classname": classname,
+            "tier": tier,
+            "last_polled": coverage.isoformat(),
+            "uncollected_days": uncollected,
+            "lost_days": max(0, (start - coverage).days),
+        })
+    return sorted(overdue, key=lambda item: (-item["uncollected_days"], item["classname"]))
+
+def scan(all_stats, poll_state, current_date):
+    """
+    Rapporto sulle lacune della cronologia al giorno 'current_date'.
+    """
+    dates = missing_dates(all_stats, current_date)
+    overdue = overdue_items(all_stats, poll_state, current_date)
+    return {
+        "date": current_date.isoformat(),
+        "window_start": window_start(current_date).isoformat(),
+        "missing_dates": dates,
+        "overdue_items": overdue,
+        "lost_dates": sum(1 for day in dates if not day["recoverable"]),
+        "lost_item_days": sum(item["lost_days"] for item in overdue),
+    }
+
+def backfill_targets(all_stats, report, current_date):
+    """
+    Items da interrogare di nuovo e giorni da reintegrare per recuperare le
+    lacune ancora entro la finestra dell'API:
+      - gli items in ritardo (i loro record dall'ultimo fetch vengono aggiunti normalmente);
+      - per i giorni mancanti, gli items non "dormant": quelli senza scambi
+        né offerte negli ultimi 30 giorni non possono avere record da recuperare.
+    Restituisce (insieme di classnames, insieme di date ISO da reintegrare).
+    """
+    classnames = {item["classname"] for item in report["overdue_items"] if item["uncollected_days"] > item["lost_days"]}
+    fill_dates = {day["date"] for day in report["missing_dates"] if day["recoverable"]}
+    if fill_dates:
+        classnames.update(
+            classname for classname, history in all_stats.items()
+            if poll_scheduler.classify(history, current_date) != "dormant"
+        )
+    return classnames, fill_dates
+
+def main():
+    parser = argparse.ArgumentParser(description="Report missing days and overdue items in the price history.")
+    parser.add_argument("--hotel", default=hotels.DEFAULT_HOTEL, choices=sorted(hotels.HOTELS))
+    parser.add_argument("--date", help="scan as of this date (YYYY-MM-DD, default: today)")
+    parser.add_argument("--json", action="store_true", help="print the full report as JSON")
+    args = parser.parse_args()
+
+    current_date = datetime.date.fromisoformat(args.date) if args.date else datetime.date.today()
+    paths = hotels.output_paths(args.hotel)
+    all_stats = history_store.load_all(paths["store_dir"], paths["legacy_file"])
+    poll_state = poll_scheduler.load_poll_state(paths["poll_state_file"])
+    report = scan(all_stats, poll_state, current_date)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    classnames, fill_dates = backfill_targets(all_stats, report, current_date)
+    print(f"Gap report for {args.hotel} as of {report['date']} (API window from {report['window_start']}):")
+    for day in report["missing_dates"]:
+        status = "recoverable" if day["recoverable"] else "lost"
+        print(f"  missing {day['date']}: {day['records']} records ({status})")
+    print(f"  {len(report['overdue_items'])} overdue items, {report['lost_item_days']} item-days lost")
+    print(f"  {report['lost_dates']} days lost for the whole catalogue")
+    print(f"Backfill would poll {len(classnames)} items and refill {len(fill_dates)} days (python update_stats.py --backfill).")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Formato colonnare binario (npz) per la cronologia dei prezzi.
+
+Invece di una lista di dizionari di stringhe per ogni item, tutti i record
+vengono concatenati in array numerici tipizzati, in stile CSR:
+  - "classnames": array di stringhe, un elemento per item (ordinati)
+  - "offsets":    int64, i record dell'item i sono in [offsets[i], offsets[i+1])
+  - "day":        int32, data del record come numero di giorni dal 1970-01-01
+  - "statsDay":   int32, data di raccolta (statsDate) nello stesso formato
+  - un array int32 per ciascun campo in FIELDS
+"""
+import argparse
+import datetime
+
+import numpy as np
+
+import history_store
+
+# Campi numerici di ogni record
+FIELDS = ("averagePrice", "totalSoldItems", "totalCreditSum", "totalOpenOffers")
+
+# Origine dei numeri di giorno
+EPOCH = datetime.date(1970, 1, 1)
+
+# File di default per l'esportazione
+DEFAULT_FILE = "historical_stats.npz"
+
+def date_to_day(value):
+    return (datetime.date.fromisoformat(value) - EPOCH).days
+
+def day_to_date(day):
+    return (EPOCH + datetime.timedelta(days=int(day))).isoformat()
+
+def record_day(record):
+    return (history_store.record_date(record) - EPOCH).days
+
+def to_columnar(stats):
+    """
+    Converte la cronologia JSON (classname -> lista di record) in un dizionario di array.
+    """
+    classnames = sorted(stats)
+    offsets = np.zeros(len(classnames) + 1, dtype=np.int64)
+    total = 0
+    for i, classname in enumerate(classnames):
+        total += len(stats[classname])
+        offsets[i + 1] = total
+    day = np.empty(total, dtype=np.int32)
+    stats_day = np.empty(total, dtype=np.int32)
+    columns = {field: np.empty(total, dtype=np.int32) for field in FIELDS}
+    row = 0
+    for classname in classnames:
+        for record in stats[classname]:
+            day[row] = record_day(record)
+            stats_day[row] = date_to_day(record["statsDate"]) if "statsDate" in record else day[row]
+            for field in FIELDS:
+                columns[field][row] = int(record.get(field, "0"))
+            row += 1
+    arrays = {
+        "classnames": np.array(classnames, dtype=np.str_),
+        "offsets": offsets,
+        "day": day,
+        "statsDay": stats_day,
+    }
+    arrays.update(columns)
+    return arrays
+
+def from_columnar(arrays):
+    """
+    Ricostruisce la cronologia JSON (con valori stringa) dagli array.
+    Il dayOffset non viene ricostruito: si ottiene con history_store.with_day_offsets.
+    """
+    offsets = arrays["offsets"]
+    columns = {field: arrays[field].tolist() for field in FIELDS}
+    day = arrays["day"].tolist()
+    stats_day = arrays["statsDay"].tolist()
+    stats = {}
+    for i, classname in enumerate(arrays["classnames"].tolist()):
+        history = []
+        for row in range(int(offsets[i]), int(offsets[i + 1])):
+            record = {}
+            for field in FIELDS:
+                record[field] = str(columns[field][row])
+            record["statsDate"] = day_to_date(stats_day[row])
+            record["date"] = day_to_date(day[row])
+            history.append(record)
+        stats[classname] = history
+    return stats
+
+def item_columns(arrays, classname):
+    """
+    Restituisce le viste (senza copia) sugli array di un singolo item, o None se assente.
+    """
+    classnames = arrays["classnames"]
+    i = int(np.searchsorted(classnames, classname))
+    if i >= len(classnames) or classnames[i] != classname:
+        return None
+    start, end = int(arrays["offsets"][i]), int(arrays["offsets"][i + 1])
+    return {key: arrays[key][start:end] for key in ("day", "statsDay") + FIELDS}
+
+def save_npz(arrays, path=DEFAULT_FILE):
+    np.savez_compressed(path, **arrays)
+
+def load_npz(path=DEFAULT_FILE):
+    with np.load(path) as data:
+        return {key: data[key] for key in data.files}
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the price history to/from the columnar npz format.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="write the current history store to an npz file")
+    export_parser.add_argument("path", nargs="?", default=DEFAULT_FILE)
+    import_parser = subparsers.add_parser("import", help="replace the history store with the content of an npz file")
+    import_parser.add_argument("path", nargs="?", default=DEFAULT_FILE)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        arrays = to_columnar(history_store.load_all())
+        save_npz(arrays, args.path)
+        print(f"Exported {len(arrays['classnames'])} items ({len(arrays['day'])} records) to {args.path}.")
+    else:
+        stats = from_columnar(load_npz(args.path))
+        history_store.save(stats)
+        print(f"Imported {len(stats)} items from {args.path}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+import bisect
+import json
+import os
+
+import history_store
+
+# Versione del formato dell'indice: un indice di versione diversa viene ricostruito
+INDEX_VERSION = 1
+
+# Posizione dei campi nelle voci dell'indice (liste compatte, una riga per item)
+TYPE, FURNILINE, SHARD, FIRST_DATE, LAST_DATE, RECORDS = range(6)
+
+# Chiave della firma usata quando la cronologia è ancora nel file legacy
+LEGACY_SIGNATURE = ""
+
+def _empty_index():
+    return {"version": INDEX_VERSION, "catalogue_joined": False, "signatures": {}, "items": {}}
+
+def load_index(path):
+    if not os.path.exists(path):
+        return _empty_index()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except Exception as e:
+        print(f"Error reading history index {path}: {e}")
+        return _empty_index()
+    if index.get("version") != INDEX_VERSION:
+        return _empty_index()
+    return index
+
+def save_index(path, index):
+    """
+    Salva l'indice con una riga per item.
+    """
+    header = {key: index[key] for key in ("version", "catalogue_joined", "signatures")}
+    lines = [f"{json.dumps(classname)}:{json.dumps(entry, separators=(',', ':'))}" for classname, entry in sorted(index["items"].items())]
+    text = json.dumps(header)[:-1] + ',"items":{\n' + ",\n".join(lines) + "\n}}\n"
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_file, path)
+
+def _signature(path):
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def _current_signatures(store_dir, legacy_file):
+    if history_store.needs_migration(store_dir, legacy_file):
+        return {LEGACY_SIGNATURE: _signature(legacy_file)}
+    if not os.path.isdir(store_dir):
+        return {}
+    return {
+        filename[:-len(".json")]: _signature(os.path.join(store_dir, filename))
+        for filename in os.listdir(store_dir)
+        if filename.endswith(".json")
+    }
+
+def _entry(classname, history, previous):
+    dates = [history_store.record_date(record).isoformat() for record in history]
+    item_type, furniline = (previous[TYPE], previous[FURNILINE]) if previous else (None, None)
+    return [item_type, furniline, history_store.shard_name(classname), min(dates, default=None), max(dates, default=None), len(history)]
+
+def refresh(index, store_dir=history_store.STORE_DIR, legacy_file=history_store.LEGACY_FILE):
+    """
+    Aggiorna le voci dell'indice per gli shard modificati dall'ultimo
+    aggiornamento (confrontando mtime e dimensione dei file): solo quegli
+    shard vengono riletti. Restituisce True se l'indice è cambiato.
+    """
+    current = _current_signatures(store_dir, legacy_file)
+    previous = index["signatures"]
+    stale = {name for name, signature in current.items() if previous.get(name) != signature}
+    removed = set(previous) - set(current)
+    if not stale and not removed:
+        return False
+    items = index["items"]
+    if LEGACY_SIGNATURE in stale or LEGACY_SIGNATURE in removed:
+        # Passaggio dal/al file legacy: si ricalcola tutto
+        stats = history_store.load_all(store_dir, legacy_file)
+        scope = None
+    else:
+        stats = {}
+        for name in stale:
+            stats.update(history_store.load_shard(name, store_dir))
+        scope = stale | removed
+    for classname, entry in list(items.items()):
+        if (scope is None or entry[SHARD] in scope) and classname not in stats:
+            if entry[TYPE] is None:
+                # Né nello store né nel furnidata
+                del items[classname]
+            else:
+                entry[FIRST_DATE], entry[LAST_DATE], entry[RECORDS] = None, None, 0
+    for classname, history in stats.items():
+        items[classname] = _entry(classname, history, items.get(classname))
+    index["signatures"] = current
+    return True
+
+def join_catalogue(index, catalogue):
+    """
+    Registra tipo e furniline dal furnidata ('catalogue': lista di
+    {"classname", "type", "furniline"}, vedi update_stats.load_classnames).
+    Gli items del furnidata senza cronologia vengono indicizzati senza date.
+    """
+    items = index["items"]
+    for item in catalogue:
+        classname = item["classname"]
+        entry = items.get(classname) or [None, None, history_store.shard_name(classname), None, None, 0]
+        entry[TYPE] = item["type"]
+        entry[FURNILINE] = item.get("furniline") or ""
+        items[classname] = entry
+    index["catalogue_joined"] = True
+
+def update_index(path, store_dir=history_store.STORE_DIR, legacy_file=history_store.LEGACY_FILE, catalogue=None):
+    """
+    Carica l'indice da 'path', lo aggiorna (shard modificati ed eventualmente
+    il furnidata) e lo salva se è cambiato. Restituisce l'indice.
+    """
+    index = load_index(path)
+    changed = refresh(index, store_dir, legacy_file)
+    if catalogue:
+        join_catalogue(index, catalogue)
+        changed = True
+    if changed:
+        save_index(path, index)
+    return index
+
+def select(index, classnames=None, prefix=None, furniline=None, item_type=None, since=None, until=None):
+    """
+    Classnames (ordinati) che soddisfano tutti i filtri indicati. 'since' e
+    'until' (date ISO, inclusive) selezionano gli items con almeno un giorno
+    di cronologia nell'intervallo, in base alle date registrate nell'indice.
+    """
+    items = index["items"]
+    names = sorted(items)
+    if prefix:
+        start = bisect.bisect_left(names, prefix)
+        end = bisect.bisect_left(names, prefix + "\U0010ffff")
+        names = names[start:end]
+    if classnames:
+        wanted = set(classnames)
+        names = [classname for classname in names if classname in wanted]
+    result = []
+    for classname in names:
+        entry = items[classname]
+        if furniline is not None and (entry[FURNILINE] or "").lower() != furniline.lower():
+            continue
+        if item_type is not None and entry[TYPE] != item_type:
+            continue
+        if since or until:
+            if entry[FIRST_DATE] is None:
+                continue
+            if since and entry[LAST_DATE] < since:
+                continue
+            if until and entry[FIRST_DATE] > until:
+                continue
+        result.append(classname)
+    return result
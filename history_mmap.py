@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+File binario a layout fisso per leggere la cronologia dei prezzi con mmap.
+
+Il file viene rigenerato dallo store con "history_mmap.py build" (dopo
+ogni aggiornamento, sulla macchina che lo interroga) e non viene mai
+modificato sul posto (sostituzione atomica), quindi più processi possono
+mapparlo in sola lettura condividendo la page cache: l'apertura non
+legge nulla e ogni query tocca solo le pagine degli items richiesti.
+Layout (little-endian):
+  - header (HEADER):  magic, versione, numero di items, numero di record,
+                      offset della tabella dei nomi e dei record
+  - tabella items:    per ogni item (ordinati per classname in UTF-8)
+                      offset e lunghezza del nome, primo record, numero di record
+  - nomi:             classnames UTF-8 concatenati
+  - record:           RECORD_FIELDS come int32, ordinati per data
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+
+import history_columnar
+import history_store
+import hotels
+
+MAGIC = b"HMAP"
+FORMAT_VERSION = 1
+
+# magic, versione, items, record, offset dei nomi, offset dei record
+HEADER = struct.Struct("<4sIIIQQ")
+
+# offset del nome, lunghezza del nome, primo record, numero di record
+ITEM = struct.Struct("<IIII")
+
+# Campi di ogni record: le date come numero di giorno di history_columnar,
+# poi i campi numerici
+RECORD_FIELDS = ("day", "statsDay") + history_columnar.FIELDS
+RECORD = struct.Struct("<" + "i" * len(RECORD_FIELDS))
+
+def _pack_record(record):
+    day = history_columnar.record_day(record)
+    stats_day = history_columnar.date_to_day(record["statsDate"]) if "statsDate" in record else day
+    return RECORD.pack(day, stats_day, *(int(record.get(field, "0")) for field in history_columnar.FIELDS))
+
+def build(stats, path):
+    """
+    Scrive la cronologia 'stats' (classname -> lista di record) nel formato
+    binario, in un file temporaneo sostituito atomicamente: i lettori che
+    hanno già mappato la versione precedente continuano a leggerla.
+    Restituisce (numero di items, numero di record).
+    """
+    entries = sorted((classname.encode("utf-8"), history) for classname, history in stats.items())
+    names = bytearray()
+    table = bytearray()
+    records = bytearray()
+    record_count = 0
+    for name, history in entries:
+        history = sorted(history, key=history_store.record_date)
+        table += ITEM.pack(len(names), len(name), record_count, len(history))
+        names += name
+        for record in history:
+            records += _pack_record(record)
+        record_count += len(history)
+    names_offset = HEADER.size + len(table)
+    # I record partono da un offset allineato a 4 byte
+    records_offset = (names_offset + len(names) + 3) & ~3
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(entries), record_count, names_offset, records_offset))
+        f.write(table)
+        f.write(names)
+        f.write(b"\0" * (records_offset - names_offset - len(names)))
+        f.write(records)
+    os.replace(tmp_file, path)
+    return len(entries), record_count
+
+
+class MappedHistory:
+    """
+    Lettore in sola lettura del file generato da build(). Le ricerche per
+    classname e per prefisso sono binarie sulla tabella degli items.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.item_count, self.record_count, self.names_offset, self.records_offset = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.mm.close()
+            raise ValueError(f"{path} is not a history file of version {FORMAT_VERSION}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.item_count
+
+    def close(self):
+        self.mm.close()
+
+    def _item(self, i):
+        return ITEM.unpack_from(self.mm, HEADER.size + i * ITEM.size)
+
+    def _name(self, i):
+        name_offset, name_length, _, _ = self._item(i)
+        start = self.names_offset + name_offset
+        return self.mm[start:start + name_length]
+
+    def _lower_bound(self, key):
+        low, high = 0, self.item_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._name(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def find(self, classname):
+        """
+        Posizione di 'classname' nella tabella, o -1 se assente.
+        """
+        key = classname.encode("utf-8")
+        i = self._lower_bound(key)
+        if i < self.item_count and self._name(i) == key:
+            return i
+        return -1
+
+    def classnames(self, prefix=""):
+        """
+        Classnames (ordinati) che iniziano con 'prefix'.
+        """
+        key = prefix.encode("utf-8")
+        result = []
+        for i in range(self._lower_bound(key), self.item_count):
+            name = self._name(i)
+            if not name.startswith(key):
+                break
+            result.append(name.decode("utf-8"))
+        return result
+
+    def rows(self, classname, since=None, until=None):
+        """
+        Tuple di interi (vedi RECORD_FIELDS) di un item, filtrate per data
+        (date ISO, inclusive). None se l'item non è presente.
+        """
+        i = self.find(classname)
+        if i < 0:
+            return None
+        _, _, first, count = self._item(i)
+        start = self.records_offset + first * RECORD.size
+        rows = RECORD.iter_unpack(self.mm[start:start + count * RECORD.size])
+        low = history_columnar.date_to_day(since) if since else None
+        high = history_columnar.date_to_day(until) if until else None
+        return [row for row in rows if (low is None or row[0] >= low) and (high is None or row[0] <= high)]
+
+    def get(self, classname, since=None, until=None):
+        """
+        Cronologia di un item nel formato dello store (valori stringa, senza
+        dayOffset), o None se l'item non è presente.
+        """
+        rows = self.rows(classname, since, until)
+        if rows is None:
+            return None
+        history = []
+        for row in rows:
+            record = {field: str(value) for field, value in zip(history_columnar.FIELDS, row[2:])}
+            record["statsDate"] = history_columnar.day_to_date(row[1])
+            record["date"] = history_columnar.day_to_date(row[0])
+            history.append(record)
+        return history
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the memory-mapped price history.")
+    parser.add_argument("--hotel", default=hotels.DEFAULT_HOTEL, choices=sorted(hotels.HOTELS))
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("build", help="regenerate the file from the history store")
+    get_parser = subparsers.add_parser("get", help="print the history of classnames as JSON lines")
+    get_parser.add_argument("classname", nargs="+")
+    get_parser.add_argument("--since", help="first date (YYYY-MM-DD, inclusive)")
+    get_parser.add_argument("--until", help="last date (YYYY-MM-DD, inclusive)")
+    list_parser = subparsers.add_parser("list", help="list the classnames starting with a prefix")
+    list_parser.add_argument("prefix", nargs="?", default="")
+    args = parser.parse_args()
+
+    paths = hotels.output_paths(args.hotel)
+    start = time.perf_counter()
+    if args.command == "build":
+        stats = history_store.load_all(paths["store_dir"], paths["legacy_file"])
+        items, records = build(stats, paths["mmap_file"])
+        print(f"Wrote {items} items ({records} records) to {paths['mmap_file']}.")
+        return
+    with MappedHistory(paths["mmap_file"]) as store:
+        if args.command == "get":
+            for classname in args.classname:
+                history = store.get(classname, args.since, args.until)
+                if history is not None:
+                    print(json.dumps({"classname": classname, "history": history}))
+        else:
+            for classname in store.classnames(args.prefix):
+                print(classname)
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Query completed in {elapsed:.1f} ms.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+import datetime
+import json
+import os
+import re
+
+# Directory dello store a shard (un file JSON per prefisso di classname)
+STORE_DIR = "historical_stats"
+
+# File monolitico usato prima dello store a shard (letto solo per la migrazione)
+LEGACY_FILE = "historical_stats.json"
+
+# Numero di caratteri del classname usati per scegliere lo shard
+SHARD_PREFIX_LENGTH = 3
+
+# Limite massimo per il dayOffset (in negativo)
+HISTORY_LIMIT = 30
+
+def record_date(record):
+    """
+    Restituisce la data (datetime.date) a cui si riferisce un record.
+    I record salvati prima dell'introduzione del campo "date" vengono
+    interpretati come statsDate + dayOffset.
+    """
+    if "date" in record:
+        return datetime.date.fromisoformat(record["date"])
+    stats_date = datetime.date.fromisoformat(record["statsDate"])
+    return stats_date + datetime.timedelta(days=int(record.get("dayOffset", "0")))
+
+def day_offset(record, current_date):
+    """
+    Calcola il dayOffset di un record rispetto a 'current_date' a partire dal
+    campo fisso "date", limitato a -HISTORY_LIMIT. Il valore non viene salvato.
+    """
+    return max(-(current_date - record_date(record)).days, -HISTORY_LIMIT)
+
+def with_day_offsets(history, current_date):
+    """
+    Vista della cronologia nel formato storico: copie dei record con il
+    campo "dayOffset" (stringa) calcolato rispetto a 'current_date'.
+    """
+    return [dict(record, dayOffset=str(day_offset(record, current_date))) for record in history]
+
+def _normalize(stats):
+    """
+    Porta i record letti da file nel formato corrente: "date" sempre presente
+    e nessun "dayOffset" memorizzato (ora derivato in lettura).
+    """
+    for history in stats.values():
+        for record in history:
+            if "dayOffset" in record:
+                if "date" not in record:
+                    record["date"] = record_date(record).isoformat()
+                del record["dayOffset"]
+    return stats
+
+def shard_name(classname):
+    """
+    Restituisce il nome dello shard di un classname: i primi SHARD_PREFIX_LENGTH
+    caratteri in minuscolo, con i caratteri non alfanumerici sostituiti da "_".
+    """
+    prefix = classname[:SHARD_PREFIX_LENGTH].lower().ljust(SHARD_PREFIX_LENGTH, "_")
+    return re.sub(r"[^a-z0-9]", "_", prefix)
+
+def shard_path(name, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f"{name}.json")
+
+def _read_shard(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _write_shard(path, items):
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(items, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_file, path)
+
+def needs_migration(store_dir=STORE_DIR, legacy_file=LEGACY_FILE):
+    """
+    True se esiste solo il file monolitico e lo store a shard non è ancora stato creato.
+    'legacy_file' può essere None per gli store che non hanno un file legacy.
+    """
+    return legacy_file is not None and not os.path.isdir(store_dir) and os.path.exists(legacy_file)
+
+def load_all(store_dir=STORE_DIR, legacy_file=LEGACY_FILE):
+    """
+    Carica l'intera cronologia come dizionario classname -> lista di record.
+    Se lo store a shard non esiste ancora, legge il file monolitico legacy.
+    """
+    if needs_migration(store_dir, legacy_file):
+        with open(legacy_file, "r", encoding="utf-8") as f:
+            return _normalize(json.load(f))
+    stats = {}
+    if not os.path.isdir(store_dir):
+        return stats
+    for filename in sorted(os.listdir(store_dir)):
+        if filename.endswith(".json"):
+            stats.update(_read_shard(os.path.join(store_dir, filename)))
+    return _normalize(stats)
+
+def load_items(classnames, store_dir=STORE_DIR, legacy_file=LEGACY_FILE):
+    """
+    Carica solo la cronologia dei classnames richiesti, leggendo unicamente
+    gli shard che li contengono. I classnames assenti non compaiono nel risultato.
+    """
+    if needs_migration(store_dir, legacy_file):
+        stats = load_all(store_dir, legacy_file)
+        return {c: stats[c] for c in classnames if c in stats}
+    by_shard = {}
+    for classname in classnames:
+        by_shard.setdefault(shard_name(classname), []).append(classname)
+    result = {}
+    for name, wanted in by_shard.items():
+        shard = _read_shard(shard_path(name, store_dir))
+        for classname in wanted:
+            if classname in shard:
+                result[classname] = shard[classname]
+    return _normalize(result)
+
+def load_shard(name, store_dir=STORE_DIR):
+    """
+    Carica la cronologia di tutti i classnames contenuti nello shard 'name'.
+    """
+    return _normalize(_read_shard(shard_path(name, store_dir)))
+
+def iter_shards(store_dir=STORE_DIR, legacy_file=LEGACY_FILE):
+    """
+    Restituisce la cronologia uno shard alla volta (dizionari classname -> record),
+    così in memoria resta un solo shard. Prima della migrazione restituisce
+    l'intero file legacy in un solo blocco.
+    """
+    if needs_migration(store_dir, legacy_file):
+        yield load_all(store_dir, legacy_file)
+        return
+    if not os.path.isdir(store_dir):
+        return
+    for filename in sorted(os.listdir(store_dir)):
+        if filename.endswith(".json"):
+            yield load_shard(filename[:-len(".json")], store_dir)
+
+def load_item(classname, store_dir=STORE_DIR, legacy_file=LEGACY_FILE):
+    """
+    Restituisce la cronologia di un singolo classname (None se assente).
+    """
+    return load_items([classname], store_dir, legacy_file).get(classname)
+
+def save(stats, changed=None, store_dir=STORE_DIR, legacy_file=LEGACY_FILE):
+    """
+    Salva 'stats' (l'intera cronologia) nello store a shard riscrivendo solo gli
+    shard che contengono almeno un classname in 'changed' (tutti se 'changed' è None).
+    Alla prima scrittura dopo la migrazione il file legacy viene rimosso.
+    Restituisce il numero di shard scritti.
+    """
+    migrating = needs_migration(store_dir, legacy_file)
+    if migrating:
+        changed = None
+    os.makedirs(store_dir, exist_ok=True)
+    if changed is None:
+        dirty = {shard_name(classname) for classname in stats}
+    else:
+        dirty = {shard_name(classname) for classname in changed}
+    shards = {name: {} for name in dirty}
+    for classname in sorted(stats):
+        name = shard_name(classname)
+        if name in shards:
+            shards[name][classname] = stats[classname]
+    for name, items in shards.items():
+        _write_shard(shard_path(name, store_dir), items)
+    if migrating:
+        os.remove(legacy_file)
+        print(f"Migrated {legacy_file} to {len(shards)} shards in {store_dir}/.")
+    return len(shards)
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+import os
+
+import history_store
+
+# Hotel supportati: codice -> dominio
+HOTELS = {
+    "it": "habbo.it",
+    "com": "habbo.com",
+    "de": "habbo.de",
+    "es": "habbo.es",
+    "fr": "habbo.fr",
+    "com.br": "habbo.com.br",
+    "com.tr": "habbo.com.tr",
+    "fi": "habbo.fi",
+    "nl": "habbo.nl",
+}
+
+# Hotel storico del repository: mantiene i percorsi di output originali
+DEFAULT_HOTEL = "it"
+
+def base_url(hotel):
+    """
+    URL base di un hotel. La variabile d'ambiente HABBO_BASE_URL, se impostata,
+    sostituisce il dominio reale (ad esempio per puntare a un server locale).
+    """
+    override = os.environ.get("HABBO_BASE_URL")
+    if override:
+        return override.rstrip("/")
+    return f"https://www.{HOTELS[hotel]}"
+
+def output_paths(hotel):
+    """
+    Percorsi dei file prodotti da update_stats per un hotel:
+      - "store_dir":       directory dello store a shard
+      - "legacy_file":     file monolitico da migrare (solo per l'hotel di default)
+      - "checkpoint_file": checkpoint dell'esecuzione corrente
+      - "poll_state_file": data dell'ultimo fetch riuscito per classname
+      - "aggregates_dir":  file precalcolati (totali giornalieri, classifiche, riepiloghi)
+      - "index_file":      indice della cronologia per query_stats (non versionato)
+      - "mmap_file":       cronologia in formato binario per history_mmap (non versionata)
+      - "exports_dir":     esportazioni CSV/SQLite/Parquet di export_stats (non versionate)
+    """
+    if hotel == DEFAULT_HOTEL:
+        return {
+            "store_dir": history_store.STORE_DIR,
+            "legacy_file": history_store.LEGACY_FILE,
+            "checkpoint_file": "stats_checkpoint.json",
+            "poll_state_file": "poll_state.json",
+            "aggregates_dir": "aggregates",
+            "index_file": "history_index.json",
+            "mmap_file": "history_mmap.bin",
+            "exports_dir": "exports",
+        }
+    suffix = hotel.replace(".", "_")
+    return {
+        "store_dir": f"{history_store.STORE_DIR}_{suffix}",
+        "legacy_file": None,
+        "checkpoint_file": f"stats_checkpoint_{suffix}.json",
+        "poll_state_file": f"poll_state_{suffix}.json",
+        "aggregates_dir": f"aggregates_{suffix}",
+        "index_file": f"history_index_{suffix}.json",
+        "mmap_file": f"history_mmap_{suffix}.bin",
+        "exports_dir": f"exports_{suffix}",
+    }
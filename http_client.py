@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+import os
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import run_metrics
+
+# Numero massimo di connessioni keep-alive mantenute per ciascun host
+POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "16"))
+
+# Numero di host distinti per cui mantenere un pool (habbo, discord, ...)
+POOL_HOSTS = int(os.environ.get("HTTP_POOL_HOSTS", "8"))
+
+# Timeout di default (secondi) per tutte le richieste
+DEFAULT_TIMEOUT = 10
+
+_session = None
+_session_pool_size = 0
+_lock = threading.Lock()
+
+def normalize_url(url):
+    """
+    Riscrive gli URL dei domini Habbo in "https://www.<dominio>/...", in modo
+    da evitare i redirect http -> https e dominio nudo -> www.
+    Gli altri URL vengono restituiti invariati.
+    """
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower()
+    if not (host.startswith("habbo.") or host.startswith("www.habbo.")):
+        return url
+    if not host.startswith("www."):
+        host = "www." + host
+    return urlunsplit(("https", host, parts.path, parts.query, parts.fragment))
+
+def get_session(pool_size=None):
+    """
+    Restituisce la sessione HTTP condivisa (thread-safe), creandola al primo uso.
+    Se viene richiesto un pool più grande di quello attuale, gli adapter
+    vengono ricreati con la nuova dimensione.
+    """
+    global _session, _session_pool_size
+    pool_size = pool_size or POOL_SIZE
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+        if pool_size > _session_pool_size:
+            adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_size)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+            _session_pool_size = pool_size
+        return _session
+
+def _request(method, url, **kwargs):
+    """
+    Esegue la richiesta tramite la sessione condivisa registrando in run_metrics
+    latenza (fino agli header per le richieste in streaming), esito e byte ricevuti.
+    I byte delle risposte in streaming sono conteggiati da chi legge il corpo.
+    """
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    url = normalize_url(url)
+    host = urlsplit(url).hostname or ""
+    start = time.perf_counter()
+    try:
+        response = get_session().request(method, url, **kwargs)
+    except Exception:
+        run_metrics.incr("http_requests_total", host=host, method=method, status="error")
+        raise
+    run_metrics.observe("http_request_duration_seconds", time.perf_counter() - start, host=host, method=method)
+    run_metrics.incr("http_requests_total", host=host, method=method, status=response.status_code)
+    if not kwargs.get("stream"):
+        run_metrics.incr("http_response_bytes_total", len(response.content), host=host)
+    return response
+
+def get(url, **kwargs):
+    """
+    GET tramite la sessione condivisa, con URL normalizzato e timeout di default.
+    """
+    return _request("GET", url, **kwargs)
+
+def post(url, **kwargs):
+    """
+    POST tramite la sessione condivisa, con timeout di default.
+    """
+    return _request("POST", url, **kwargs)
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+def parse_key_values(text):
+    """
+    Converte un file "chiave=valore" (external_variables, external_flash_texts)
+    in un dizionario (chiave, occorrenza) -> valore, preservando l'ordine del file.
+    I file upstream contengono alcune chiavi ripetute: l'indice di occorrenza
+    (0 per la prima) le mantiene distinte invece di sovrascriverle.
+    Le righe vuote vengono ignorate; le righe senza "=" diventano chiavi con
+    valore vuoto.
+    """
+    values = {}
+    occurrences = {}
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        key, _, value = line.partition("=")
+        count = occurrences.get(key, 0)
+        occurrences[key] = count + 1
+        values[(key, count)] = value
+    return values
+
+def diff_key_values(old_values, new_values):
+    """
+    Confronta due dizionari prodotti da parse_key_values con lookup hash (tempo lineare,
+    indipendente dall'ordine delle righe). Le chiavi sono coppie (chiave, occorrenza).
+    Restituisce un dizionario con:
+      - "added":   lista di (chiave, valore)
+      - "removed": lista di (chiave, valore)
+      - "changed": lista di (chiave, vecchio valore, nuovo valore)
+    """
+    diff = {"added": [], "removed": [], "changed": []}
+    for key, value in new_values.items():
+        if key not in old_values:
+            diff["added"].append((key, value))
+        elif old_values[key] != value:
+            diff["changed"].append((key, old_values[key], value))
+    for key, value in old_values.items():
+        if key not in new_values:
+            diff["removed"].append((key, value))
+    return diff
+
+def diff_texts(old_text, new_text):
+    return diff_key_values(parse_key_values(old_text), parse_key_values(new_text))
+
+def format_diff_lines(diff):
+    """
+    Rappresentazione in stile "diff" per Discord: una voce per chiave.
+    Restituisce (aggiunte, rimozioni, modifiche), dove ogni modifica occupa
+    due righe ("-" vecchio valore, "+" nuovo valore) nella stessa voce.
+    """
+    additions = [f"+{key}={value}" for (key, _), value in diff["added"]]
+    deletions = [f"-{key}={value}" for (key, _), value in diff["removed"]]
+    modifications = [f"-{key}={old}\n+{key}={new}" for (key, _), old, new in diff["changed"]]
+    return additions, deletions, modifications
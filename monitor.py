@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+import asyncio
+import datetime
+import os
+
+import discord_dispatcher
+import gamedata_cache
+import keyvalue_diff
+import run_metrics
+import snapshot_archive
+
+# Lunghezza massima della descrizione di un embed (lasciando margine per il blocco ```diff)
+MAX_LENGTH = 1900
+
+def make_source(name, label, url, webhook, load_local, save_local, parse, differ, has_changes, render, local_file, on_update=None):
+    """
+    Descrive una sorgente di gamedata da monitorare:
+      - name:        identificativo (usato anche come consumer della cache)
+      - label:       nome leggibile usato nei messaggi
+      - url:         risorsa da scaricare
+      - webhook:     webhook Discord a cui inviare le notifiche
+      - load_local/save_local: lettura/scrittura dello snapshot locale
+      - parse:       risorsa in cache -> dati
+      - differ:      (vecchi dati, nuovi dati) -> diff
+      - has_changes: diff -> bool
+      - render:      diff -> lista di embed
+      - local_file:  percorso dello snapshot locale
+      - on_update:   opzionale, (vecchi dati, nuovi dati, diff) chiamata dopo
+                     ogni salvataggio dello snapshot (diff None per lo snapshot iniziale)
+    """
+    return {
+        "name": name,
+        "label": label,
+        "url": url,
+        "webhook": webhook,
+        "load_local": load_local,
+        "save_local": save_local,
+        "parse": parse,
+        "differ": differ,
+        "has_changes": has_changes,
+        "render": render,
+        "local_file": local_file,
+        "on_update": on_update,
+    }
+
+def archive_snapshot(source):
+    """
+    Aggiunge lo snapshot locale corrente all'archivio delle versioni (vedi
+    snapshot_archive); nessuna nuova versione se il contenuto è già l'ultimo archiviato.
+    """
+    if not os.path.exists(source["local_file"]):
+        return
+    try:
+        with run_metrics.phase("archive", source=source["name"]):
+            with open(source["local_file"], "rb") as f:
+                entry = snapshot_archive.add_version(source["name"], f.read())
+        if entry:
+            print(f"Archived {source['label']} snapshot as version {entry['version']}.")
+    except Exception as e:
+        print(f"Error archiving {source['label']} snapshot: {e}")
+
+def _notify_update(source, old_data, new_data, diff):
+    if source.get("on_update") is None:
+        return
+    try:
+        with run_metrics.phase("on_update", source=source["name"]):
+            source["on_update"](old_data, new_data, diff)
+    except Exception as e:
+        print(f"Error updating {source['label']} indexes: {e}")
+
+def check_source(source):
+    """
+    Esegue il ciclo download -> diff -> salvataggio di una sorgente e
+    restituisce (esito, embed da notificare). L'esito è False se il download
+    non è riuscito.
+    """
+    label = source["label"]
+    consumer = source["name"] + "_monitor"
+    try:
+        with run_metrics.phase("download", source=source["name"]):
+            resource = gamedata_cache.fetch(source["url"])
+    except Exception as e:
+        print(f"Error downloading {label}: {e}")
+        return False, []
+
+    # Contenuto già elaborato in un'esecuzione precedente: nessun parsing necessario
+    if os.path.exists(source["local_file"]) and gamedata_cache.is_processed(resource, consumer):
+        print(f"No changes in {label} as of {datetime.datetime.now().isoformat()}.")
+        return True, []
+
+    with run_metrics.phase("load", source=source["name"]):
+        new_data = source["parse"](resource)
+        old_data = source["load_local"]()
+    embeds = []
+    if old_data is None:
+        # Primo avvio: salva lo snapshot iniziale e invia una notifica
+        source["save_local"](new_data)
+        archive_snapshot(source)
+        _notify_update(source, None, new_data, None)
+        message = f"Initial {label} Snapshot saved on {datetime.datetime.now().isoformat()}."
+        print(message)
+        embeds.append({
+            "title": f"Initial {label} Snapshot",
+            "description": message,
+            "color": 3447003  # blu
+        })
+    else:
+        with run_metrics.phase("diff", source=source["name"]):
+            diff = source["differ"](old_data, new_data)
+        if source["has_changes"](diff):
+            embeds = source["render"](diff)
+            # Lo snapshot precedente entra nell'archivio se non c'è già (primo avvio dell'archivio)
+            archive_snapshot(source)
+            with run_metrics.phase("save", source=source["name"]):
+                source["save_local"](new_data)
+            archive_snapshot(source)
+            _notify_update(source, old_data, new_data, diff)
+            run_metrics.incr("monitor_changes_total", source=source["name"])
+            print(f"{label} updated.")
+        else:
+            print(f"No changes in {label} as of {datetime.datetime.now().isoformat()}.")
+    gamedata_cache.mark_processed(resource, consumer)
+    return True, embeds
+
+async def run_source(source):
+    ok, embeds = await asyncio.to_thread(check_source, source)
+    run_metrics.incr("monitor_runs_total", source=source["name"], result="ok" if ok else "failed")
+    if embeds:
+        with run_metrics.phase("notify", source=source["name"]):
+            await discord_dispatcher.send_embeds_async(source["webhook"], embeds)
+    return ok
+
+async def run_sources_async(sources):
+    return await asyncio.gather(*(run_source(source) for source in sources))
+
+def run_sources(sources, script=None):
+    """
+    Controlla tutte le sorgenti in parallelo nello stesso processo (sessione HTTP
+    e dispatcher Discord condivisi). Restituisce True se tutti i download sono riusciti.
+    Il report dell'esecuzione viene scritto come 'script' (di default
+    "monitor_<nomi delle sorgenti>") in run_metrics.METRICS_DIR.
+    """
+    script = script or "monitor_" + "_".join(source["name"] for source in sources)
+    run_metrics.reset()
+    try:
+        return all(asyncio.run(run_sources_async(sources)))
+    finally:
+        run_metrics.write_report(script)
+
+def send_test(source):
+    discord_dispatcher.send_embeds(source["webhook"], [{
+        "title": f"Test Webhook - {source['label']}",
+        "description": f"This is a test message sent on {datetime.datetime.now().isoformat()}",
+        "color": 3447003  # blu
+    }])
+
+# --- Sorgenti testuali "chiave=valore" ---
+def split_diff_chunks(diff_lines, max_length=MAX_LENGTH):
+    """
+    Suddivide la lista di righe (ognuna rappresenta una variabile) in chunk,
+    usando "\n\n" come separatore per aggiungere uno spazio (riga vuota)
+    tra le righe, senza spezzare una singola riga.
+    """
+    chunks = []
+    current_chunk = ""
+    for line in diff_lines:
+        if not current_chunk:
+            current_chunk = line
+        else:
+            if len(current_chunk) + len(line) + 2 > max_length:
+                chunks.append(current_chunk)
+                current_chunk = line
+            else:
+                current_chunk += "\n\n" + line
+    if current_chunk:
+        chunks.append(current_chunk)
+    return chunks
+
+def text_source(name, label, url, local_file, webhook):
+    """
+    Sorgente per i file "chiave=valore" (external_variables, external_flash_texts):
+    snapshot testuale locale e diff per chiave (vedi keyvalue_diff).
+    """
+    def load_local():
+        if os.path.exists(local_file):
+            with open(local_file, "r", encoding="utf-8") as f:
+                return f.read()
+        return None
+
+    def save_local(text):
+        with open(local_file, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def render(diff):
+        additions, deletions, modifications = keyvalue_diff.format_diff_lines(diff)
+        embeds = []
+        for lines, kind, color in (
+            (additions, "Additions", 65280),  # verde
+            (deletions, "Deletions", 16753920),  # arancione
+            (modifications, "Modifications", 16776960),  # giallo
+        ):
+            for chunk in split_diff_chunks(lines):
+                embeds.append({
+                    "title": f"{label} {kind}",
+                    "description": f"```diff\n{chunk}\n```",
+                    "color": color
+                })
+        return embeds
+
+    return make_source(
+        name=name,
+        label=label,
+        url=url,
+        webhook=webhook,
+        load_local=load_local,
+        save_local=save_local,
+        parse=gamedata_cache.read_text,
+        differ=keyvalue_diff.diff_texts,
+        has_changes=lambda diff: any(diff.values()),
+        render=render,
+        local_file=local_file,
+    )
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+import sys
+
+import monitor
+from external_flash_texts import external_flash_texts
+from external_variables import external_variables
+from furnidata import furnidata
+
+# Sorgenti controllate in parallelo ad ogni esecuzione
+SOURCES = [
+    furnidata.SOURCE,
+    external_variables.SOURCE,
+    external_flash_texts.SOURCE,
+]
+
+def main():
+    if not monitor.run_sources(SOURCES, "monitor_gamedata"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
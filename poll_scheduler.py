@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+import datetime
+import json
+import os
+import zlib
+
+import history_store
+
+# Intervallo di polling (giorni) per ciascun livello di attività.
+# Deve restare entro HISTORY_LIMIT: ogni risposta dell'API copre gli ultimi
+# 30 giorni, quindi un item interrogato meno spesso perderebbe dei giorni.
+POLL_INTERVALS = {
+    "active": int(os.environ.get("POLL_INTERVAL_ACTIVE", "1")),
+    "warm": int(os.environ.get("POLL_INTERVAL_WARM", "3")),
+    "dormant": int(os.environ.get("POLL_INTERVAL_DORMANT", "14")),
+}
+if min(POLL_INTERVALS.values()) < 1 or max(POLL_INTERVALS.values()) > history_store.HISTORY_LIMIT:
+    raise ValueError(f"Poll intervals must be between 1 and {history_store.HISTORY_LIMIT} days: {POLL_INTERVALS}")
+
+# Un item è "active" se ha avuto scambi negli ultimi ACTIVE_DAYS giorni
+ACTIVE_DAYS = 7
+
+# Un item è "warm" se ha avuto scambi negli ultimi WARM_DAYS giorni o ha offerte aperte
+WARM_DAYS = 30
+
+def load_poll_state(path):
+    """
+    Carica lo stato del polling: classname -> data (ISO) dell'ultimo fetch riuscito.
+    """
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_poll_state(path, state):
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=0, sort_keys=True)
+    os.replace(tmp_file, path)
+
+def last_trade_date(history):
+    """
+    Data dell'ultimo giorno con almeno un oggetto venduto (None se mai scambiato).
+    """
+    dates = [history_store.record_date(record) for record in history if int(record.get("totalSoldItems", "0")) > 0]
+    return max(dates) if dates else None
+
+def classify(history, current_date):
+    """
+    Assegna un livello di polling in base all'attività dell'item:
+      - "active":  scambi negli ultimi ACTIVE_DAYS giorni
+      - "warm":    scambi negli ultimi WARM_DAYS giorni, oppure offerte aperte
+      - "dormant": nessuna attività recente
+    """
+    last_trade = last_trade_date(history)
+    if last_trade is not None and (current_date - last_trade).days <= ACTIVE_DAYS:
+        return "active"
+    open_offers = int(history[-1].get("totalOpenOffers", "0")) if history else 0
+    if open_offers > 0 or (last_trade is not None and (current_date - last_trade).days <= WARM_DAYS):
+        return "warm"
+    return "dormant"
+
+def coverage_date(history, last_polled):
+    """
+    Primo giorno i cui dati non sono ancora stati raccolti: un fetch eseguito
+    il giorno D restituisce i dati fino a D-1. Si usa l'ultimo fetch riuscito
+    registrato nello stato del polling o, per i dati precedenti allo scheduler,
+    lo statsDate dell'ultimo record. None se l'item non è mai stato raccolto.
+    """
+    candidates = []
+    if last_polled:
+        candidates.append(datetime.date.fromisoformat(last_polled))
+    if history and "statsDate" in history[-1]:
+        candidates.append(datetime.date.fromisoformat(history[-1]["statsDate"]))
+    return max(candidates) if candidates else None
+
+def is_due(classname, all_stats, poll_state, current_date):
+    """
+    True se l'item va interrogato oggi. I classnames nuovi (assenti dalla
+    cronologia) o mai interrogati sono sempre dovuti. Gli altri vengono
+    interrogati nel giorno di fase del proprio livello, ricavato da crc32 del
+    classname, così gli items dello stesso livello si distribuiscono sui giorni
+    invece di scadere tutti insieme. In ogni caso mai più di 'intervallo' giorni
+    dopo l'ultimo fetch riuscito.
+    """
+    if classname not in all_stats or classname not in poll_state:
+        return True
+    interval = POLL_INTERVALS[classify(all_stats[classname], current_date)]
+    elapsed = (current_date - datetime.date.fromisoformat(poll_state[classname])).days
+    if elapsed >= interval:
+        return True
+    phase = zlib.crc32(classname.encode("utf-8")) % interval
+    return elapsed > 0 and (current_date.toordinal() + phase) % interval == 0
+
+def select_due(items, all_stats, poll_state, current_date):
+    """
+    Filtra gli items da interrogare oggi e stampa un riepilogo per livello.
+    """
+    due = []
+    counts = {}
+    for item in items:
+        classname = item["classname"]
+        if classname not in all_stats:
+            tier = "new"
+        else:
+            tier = classify(all_stats[classname], current_date)
+        selected = is_due(classname, all_stats, poll_state, current_date)
+        key = (tier, selected)
+        counts[key] = counts.get(key, 0) + 1
+        if selected:
+            due.append(item)
+    summary = ", ".join(
+        f"{tier} {counts.get((tier, True), 0)}/{counts.get((tier, True), 0) + counts.get((tier, False), 0)}"
+        for tier in ("new", "active", "warm", "dormant")
+    )
+    print(f"Polling {len(due)} of {len(items)} items ({summary}).")
+    return due
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import json
+import sys
+import time
+
+import history_index
+import history_store
+import hotels
+
+def load_catalogue(hotel):
+    """
+    Classnames, tipo e furniline dal furnidata dell'hotel. I messaggi di
+    update_stats vanno su stderr per non mescolarsi all'output della query.
+    """
+    import update_stats
+
+    with contextlib.redirect_stdout(sys.stderr):
+        return update_stats.load_classnames(hotel)
+
+def query(classnames, paths, since=None, until=None):
+    """
+    Legge dallo store solo gli shard che contengono 'classnames' e restituisce
+    classname -> record compresi tra 'since' e 'until' (date ISO, inclusive).
+    """
+    stats = history_store.load_items(classnames, paths["store_dir"], paths["legacy_file"])
+    result = {}
+    for classname in classnames:
+        records = [
+            record for record in stats.get(classname, [])
+            if (not since or record["date"] >= since) and (not until or record["date"] <= until)
+        ]
+        result[classname] = records
+    return result
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Query the price history through the persistent history index.")
+    parser.add_argument("--hotel", default=hotels.DEFAULT_HOTEL, choices=sorted(hotels.HOTELS))
+    parser.add_argument("--classname", action="append", help="exact classname (repeatable)")
+    parser.add_argument("--prefix", help="classname prefix")
+    parser.add_argument("--furniline", help="furniline (case-insensitive)")
+    parser.add_argument("--type", choices=("room", "wall"), help="item type")
+    parser.add_argument("--since", help="first date (YYYY-MM-DD, inclusive)")
+    parser.add_argument("--until", help="last date (YYYY-MM-DD, inclusive)")
+    parser.add_argument("--list", action="store_true", help="print the matching index entries without reading the history")
+    parser.add_argument("--refresh-furnidata", action="store_true", help="re-join type and furniline from the current furnidata")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    start = time.perf_counter()
+    paths = hotels.output_paths(args.hotel)
+    index = history_index.load_index(paths["index_file"])
+    catalogue = None
+    if args.refresh_furnidata or ((args.furniline or args.type) and not index["catalogue_joined"]):
+        catalogue = load_catalogue(args.hotel)
+    index = history_index.update_index(paths["index_file"], paths["store_dir"], paths["legacy_file"], catalogue)
+    classnames = history_index.select(index, args.classname, args.prefix, args.furniline, args.type, args.since, args.until)
+
+    records = 0
+    if args.list:
+        for classname in classnames:
+            entry = index["items"][classname]
+            print(json.dumps({
+                "classname": classname,
+                "type": entry[history_index.TYPE],
+                "furniline": entry[history_index.FURNILINE],
+                "first_date": entry[history_index.FIRST_DATE],
+                "last_date": entry[history_index.LAST_DATE],
+                "records": entry[history_index.RECORDS],
+            }))
+    else:
+        for classname, history in query(classnames, paths, args.since, args.until).items():
+            entry = index["items"][classname]
+            records += len(history)
+            print(json.dumps({
+                "classname": classname,
+                "type": entry[history_index.TYPE],
+                "furniline": entry[history_index.FURNILINE],
+                "history": history,
+            }))
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"Matched {len(classnames)} items ({records} records) in {elapsed:.1f} ms.", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
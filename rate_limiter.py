@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+import asyncio
+import time
+
+import run_metrics
+
+
+class TokenBucket:
+    """
+    Token bucket condiviso da tutte le richieste di una stessa esecuzione.
+
+    Il rate (token al secondo) si adatta in modo AIMD:
+      - ad ogni risposta 429 il rate viene moltiplicato per DECREASE_FACTOR
+        e tutte le richieste vengono sospese per il tempo indicato dal server
+        (header Retry-After) o per PENALTY_SECONDS. Le risposte 429 delle
+        richieste già in corso (token ottenuto prima dell'ultima riduzione,
+        o arrivate durante la pausa) appartengono alla stessa congestione e
+        non riducono di nuovo il rate;
+      - ad ogni risposta valida il rate aumenta di INCREASE_RATIO volte il
+        rate iniziale (0.05 richieste/s con il rate predefinito di 4/s), fino
+        a max_rate: l'incremento è proporzionale al rate configurato, così
+        il recupero dopo un 429 richiede lo stesso numero di risposte a
+        qualsiasi rate.
+    In questo modo un solo limiter regola l'intero pool di richieste concorrenti,
+    invece di un backoff indipendente per ogni item.
+    """
+
+    DECREASE_FACTOR = 0.5
+    INCREASE_RATIO = 0.0125
+    PENALTY_SECONDS = 5
+
+    def __init__(self, rate, capacity=None, min_rate=0.2, max_rate=None):
+        self.rate = float(rate)
+        self.min_rate = float(min_rate)
+        self.max_rate = float(max_rate) if max_rate is not None else self.rate * 2
+        self.increase_step = self.rate * self.INCREASE_RATIO
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.penalized_at = float("-inf")
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        self.updated_at = now
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+
+    async def acquire(self):
+        """
+        Attende finché non è disponibile un token (e finché non è terminata
+        un'eventuale pausa dovuta a un 429). Restituisce l'istante (secondo
+        time.monotonic) in cui il token è stato concesso, da passare a penalize.
+        """
+        start = time.monotonic()
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    run_metrics.incr("rate_limit_wait_seconds_total", now - start)
+                    return now
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def penalize(self, retry_after=None, acquired_at=None):
+        """
+        Registra un 429 per una richiesta il cui token è stato concesso in
+        'acquired_at' (valore restituito da acquire): sospende tutte le
+        richieste e riduce il rate, al massimo una volta per congestione.
+        Restituisce il numero di secondi di pausa applicati.
+        """
+        try:
+            pause = float(retry_after) if retry_after is not None else self.PENALTY_SECONDS
+        except ValueError:
+            pause = self.PENALTY_SECONDS
+        now = time.monotonic()
+        same_event = now < self.blocked_until or (acquired_at is not None and acquired_at < self.penalized_at)
+        self.blocked_until = max(self.blocked_until, now + pause)
+        if same_event:
+            run_metrics.incr("rate_limit_penalties_skipped_total")
+            return pause
+        self.penalized_at = now
+        self.rate = max(self.min_rate, self.rate * self.DECREASE_FACTOR)
+        self.capacity = max(1.0, min(self.capacity, self.rate))
+        self.tokens = min(self.tokens, self.capacity)
+        run_metrics.incr("rate_limit_penalties_total")
+        run_metrics.incr("rate_limit_backoff_seconds_total", pause)
+        return pause
+
+    def reward(self):
+        """
+        Registra una risposta valida: aumenta gradualmente il rate.
+        """
+        self.rate = min(self.max_rate, self.rate + self.increase_step)
+        self.capacity = max(self.capacity, min(self.rate, self.max_rate))
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+
+# Directory dei report di esecuzione (non versionata)
+METRICS_DIR = os.environ.get("METRICS_DIR", "run_reports")
+
+# Limiti superiori (secondi) dei bucket degli istogrammi di latenza
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# Metriche dell'esecuzione corrente, per processo: {(nome, etichette): valore}
+_counters = {}
+_histograms = {}
+_started_at = time.time()
+_lock = threading.Lock()
+
+def _key(name, labels):
+    return (name, tuple(sorted((key, str(value)) for key, value in labels.items())))
+
+def reset():
+    """
+    Azzera le metriche raccolte (ad esempio all'inizio dell'aggiornamento di un
+    hotel in un processo del pool che ne ha già gestito un altro).
+    """
+    global _started_at
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+        _started_at = time.time()
+
+def incr(name, amount=1, **labels):
+    """
+    Incrementa il contatore 'name' (con le etichette indicate) di 'amount'.
+    """
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def observe(name, value, buckets=LATENCY_BUCKETS, **labels):
+    """
+    Registra un valore nell'istogramma 'name' (bucket cumulativi, somma e conteggio).
+    """
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = {"buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            _histograms[key] = histogram
+        for i, bound in enumerate(histogram["buckets"]):
+            if value <= bound:
+                histogram["counts"][i] += 1
+        histogram["sum"] += value
+        histogram["count"] += 1
+
+@contextlib.contextmanager
+def phase(name, **labels):
+    """
+    Misura il tempo speso in una fase dell'esecuzione (load, fetch, save, diff, ...)
+    e lo somma al contatore phase_seconds_total{phase=name}. Più blocchi con
+    lo stesso nome si sommano.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        incr("phase_seconds_total", time.perf_counter() - start, phase=name, **labels)
+
+def snapshot():
+    """
+    Copia delle metriche raccolte, nella forma usata dal report JSON.
+    """
+    with _lock:
+        counters = [
+            {"name": name, "labels": dict(labels), "value": value}
+            for (name, labels), value in sorted(_counters.items())
+        ]
+        histograms = [
+            {
+                "name": name,
+                "labels": dict(labels),
+                "buckets": {str(bound): count for bound, count in zip(histogram["buckets"], histogram["counts"])},
+                "sum": histogram["sum"],
+                "count": histogram["count"],
+            }
+            for (name, labels), histogram in sorted(_histograms.items())
+        ]
+    return {"counters": counters, "histograms": histograms}
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for value in labels.values())
+    return "{" + ",".join(f'{key}="{value}"' for key, value in zip(labels, escaped)) + "}"
+
+def to_prometheus(report):
+    """
+    Converte un report nel formato testuale di Prometheus (textfile collector).
+    Ogni serie riceve l'etichetta script=<nome dello script>.
+    """
+    script = report["script"]
+    lines = [
+        "# TYPE run_duration_seconds gauge",
+        f"run_duration_seconds{_format_labels({'script': script})} {report['duration_seconds']}",
+        "# TYPE run_finished_timestamp_seconds gauge",
+        f"run_finished_timestamp_seconds{_format_labels({'script': script})} {report['finished_timestamp']}",
+    ]
+    typed = set()
+    for counter in report["counters"]:
+        if counter["name"] not in typed:
+            lines.append(f"# TYPE {counter['name']} counter")
+            typed.add(counter["name"])
+        labels = {"script": script, **counter["labels"]}
+        lines.append(f"{counter['name']}{_format_labels(labels)} {counter['value']}")
+    for histogram in report["histograms"]:
+        name = histogram["name"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        labels = {"script": script, **histogram["labels"]}
+        for bound, count in histogram["buckets"].items():
+            lines.append(f"{name}_bucket{_format_labels({**labels, 'le': bound})} {count}")
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': '+Inf'})} {histogram['count']}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+    return "\n".join(lines) + "\n"
+
+def write_report(script, metrics_dir=None):
+    """
+    Scrive il report dell'esecuzione in METRICS_DIR come <script>.json e
+    <script>.prom (formato textfile di Prometheus). Gli errori di scrittura
+    vengono segnalati ma non interrompono lo script.
+    """
+    metrics_dir = metrics_dir or METRICS_DIR
+    finished_at = time.time()
+    report = {
+        "script": script,
+        "started_at": datetime.datetime.fromtimestamp(_started_at).isoformat(),
+        "finished_at": datetime.datetime.fromtimestamp(finished_at).isoformat(),
+        "finished_timestamp": round(finished_at, 3),
+        "duration_seconds": round(finished_at - _started_at, 3),
+        **snapshot(),
+    }
+    try:
+        os.makedirs(metrics_dir, exist_ok=True)
+        json_path = os.path.join(metrics_dir, f"{script}.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        # Scrittura atomica: il textfile collector potrebbe leggerlo in qualsiasi momento
+        prom_path = os.path.join(metrics_dir, f"{script}.prom")
+        with open(prom_path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(to_prometheus(report))
+        os.replace(prom_path + ".tmp", prom_path)
+        print(f"Run report written to {json_path}.")
+    except Exception as e:
+        print(f"Error writing run report: {e}")
+    return report
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Archivio delle versioni degli snapshot della gamedata (furnidata,
+external_variables, external_flash_texts).
+
+Ogni versione è identificata dallo sha256 del suo contenuto e salvata in
+snapshots/<nome>/objects/ come oggetto compresso con zlib:
+  - keyframe: il contenuto completo;
+  - delta: le righe copiate dalla versione precedente e quelle nuove.
+Un keyframe ogni KEYFRAME_INTERVAL versioni limita la catena di delta da
+applicare per ricostruire una versione. Il manifest (manifest.json) elenca
+le versioni in ordine cronologico.
+"""
+import argparse
+import bisect
+import datetime
+import difflib
+import hashlib
+import json
+import os
+import sys
+import zlib
+
+# Directory dell'archivio, con una sottodirectory per sorgente
+ARCHIVE_DIR = os.environ.get(
+    "SNAPSHOT_ARCHIVE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots"),
+)
+
+# Numero massimo di delta consecutivi prima di un nuovo keyframe
+KEYFRAME_INTERVAL = 20
+
+def _source_dir(name, archive_dir):
+    return os.path.join(archive_dir or ARCHIVE_DIR, name)
+
+def _object_path(name, sha256, archive_dir):
+    return os.path.join(_source_dir(name, archive_dir), "objects", sha256[:2], sha256 + ".z")
+
+def load_manifest(name, archive_dir=None):
+    """
+    Elenco delle versioni di una sorgente: {"version", "sha256", "size", "saved_at"}.
+    """
+    path = os.path.join(_source_dir(name, archive_dir), "manifest.json")
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def _save_manifest(name, manifest, archive_dir):
+    path = os.path.join(_source_dir(name, archive_dir), "manifest.json")
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_file, path)
+
+def compute_delta(base_lines, new_lines):
+    """
+    Delta a livello di righe, in tempo lineare: per ogni riga nuova si cerca
+    la stessa riga nella versione base a partire dalla fine dell'ultima copia
+    (così i blocchi invariati restano allineati) e la si estende finché le
+    righe coincidono. Restituisce una lista di operazioni:
+      - ("C", inizio, numero di righe): copia dalla versione base
+      - ("I", bytes): righe inserite
+    """
+    positions = {}
+    for i, line in enumerate(base_lines):
+        positions.setdefault(line, []).append(i)
+    ops = []
+    inserted = []
+    expected = 0
+    j = 0
+    while j < len(new_lines):
+        candidates = positions.get(new_lines[j])
+        if not candidates:
+            inserted.append(new_lines[j])
+            j += 1
+            continue
+        k = bisect.bisect_left(candidates, expected)
+        start = candidates[k] if k < len(candidates) else candidates[0]
+        length = 1
+        while (j + length < len(new_lines) and start + length < len(base_lines)
+               and base_lines[start + length] == new_lines[j + length]):
+            length += 1
+        if inserted:
+            ops.append(("I", b"".join(inserted)))
+            inserted = []
+        ops.append(("C", start, length))
+        expected = start + length
+        j += length
+    if inserted:
+        ops.append(("I", b"".join(inserted)))
+    return ops
+
+def encode_delta(ops):
+    parts = []
+    for op in ops:
+        if op[0] == "C":
+            parts.append(b"C %d %d\n" % (op[1], op[2]))
+        else:
+            parts.append(b"I %d\n" % len(op[1]))
+            parts.append(op[1])
+    return b"".join(parts)
+
+def apply_delta(base_lines, payload):
+    """
+    Ricostruisce il contenuto applicando un delta (vedi encode_delta) alle righe base.
+    """
+    output = []
+    pos = 0
+    while pos < len(payload):
+        end = payload.index(b"\n", pos)
+        kind, *args = payload[pos:end].split(b" ")
+        pos = end + 1
+        if kind == b"C":
+            start, length = int(args[0]), int(args[1])
+            output.extend(base_lines[start:start + length])
+        else:
+            size = int(args[0])
+            output.append(payload[pos:pos + size])
+            pos += size
+    return b"".join(output)
+
+def _write_object(name, sha256, data, archive_dir):
+    path = _object_path(name, sha256, archive_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_file = path + ".tmp"
+    with open(tmp_file, "wb") as f:
+        f.write(zlib.compress(data, 9))
+    os.replace(tmp_file, path)
+
+def read_object(name, sha256, archive_dir=None):
+    """
+    Contenuto completo dell'oggetto 'sha256', seguendo la catena dei delta fino al keyframe.
+    """
+    chain = []
+    current = sha256
+    while True:
+        with open(_object_path(name, current, archive_dir), "rb") as f:
+            data = zlib.decompress(f.read())
+        header, _, payload = data.partition(b"\n")
+        if header == b"K":
+            content = payload
+            break
+        chain.append(payload)
+        current = header.split(b" ")[1].decode("ascii")
+    for delta in reversed(chain):
+        content = apply_delta(content.splitlines(keepends=True), delta)
+    if hashlib.sha256(content).hexdigest() != sha256:
+        raise ValueError(f"Corrupted snapshot object {sha256} in {name}")
+    return content
+
+def _chain_length(name, sha256, archive_dir):
+    length = 0
+    current = sha256
+    while True:
+        with open(_object_path(name, current, archive_dir), "rb") as f:
+            header = zlib.decompressobj().decompress(f.read(), 80).partition(b"\n")[0]
+        if header == b"K":
+            return length
+        length += 1
+        current = header.split(b" ")[1].decode("ascii")
+
+def add_version(name, content, archive_dir=None):
+    """
+    Aggiunge 'content' (bytes) come nuova versione di 'name'. Se il contenuto
+    è uguale all'ultima versione non viene aggiunto nulla; se coincide con una
+    versione precedente l'oggetto esistente viene riutilizzato.
+    Restituisce la voce del manifest della versione (None se invariata).
+    """
+    manifest = load_manifest(name, archive_dir)
+    sha256 = hashlib.sha256(content).hexdigest()
+    if manifest and manifest[-1]["sha256"] == sha256:
+        return None
+    if not os.path.exists(_object_path(name, sha256, archive_dir)):
+        previous = manifest[-1]["sha256"] if manifest else None
+        if previous and _chain_length(name, previous, archive_dir) + 1 < KEYFRAME_INTERVAL:
+            base_lines = read_object(name, previous, archive_dir).splitlines(keepends=True)
+            delta = encode_delta(compute_delta(base_lines, content.splitlines(keepends=True)))
+            _write_object(name, sha256, b"D " + previous.encode("ascii") + b"\n" + delta, archive_dir)
+        else:
+            _write_object(name, sha256, b"K\n" + content, archive_dir)
+    entry = {
+        "version": len(manifest) + 1,
+        "sha256": sha256,
+        "size": len(content),
+        "saved_at": datetime.datetime.now().isoformat(),
+    }
+    manifest.append(entry)
+    os.makedirs(_source_dir(name, archive_dir), exist_ok=True)
+    _save_manifest(name, manifest, archive_dir)
+    return entry
+
+def get_version(name, version, archive_dir=None):
+    """
+    Contenuto della versione 'version' (1 = la più vecchia, -1 = l'ultima).
+    """
+    manifest = load_manifest(name, archive_dir)
+    entry = manifest[version - 1] if version > 0 else manifest[version]
+    return read_object(name, entry["sha256"], archive_dir)
+
+def diff_versions(name, old_version, new_version, archive_dir=None):
+    """
+    Diff unificato (lista di righe) tra due versioni qualsiasi.
+    """
+    old_lines = get_version(name, old_version, archive_dir).decode("utf-8", errors="replace").splitlines(keepends=True)
+    new_lines = get_version(name, new_version, archive_dir).decode("utf-8", errors="replace").splitlines(keepends=True)
+    return list(difflib.unified_diff(old_lines, new_lines, f"{name}@{old_version}", f"{name}@{new_version}"))
+
+def disk_usage(name, archive_dir=None):
+    total = 0
+    for root, _, files in os.walk(os.path.join(_source_dir(name, archive_dir), "objects")):
+        total += sum(os.path.getsize(os.path.join(root, filename)) for filename in files)
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description="Browse the archived gamedata snapshots.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    list_parser = subparsers.add_parser("list", help="list the versions of a source")
+    list_parser.add_argument("name")
+    show_parser = subparsers.add_parser("show", help="print a version (1 = oldest, -1 = latest)")
+    show_parser.add_argument("name")
+    show_parser.add_argument("version", type=int)
+    diff_parser = subparsers.add_parser("diff", help="unified diff between two versions")
+    diff_parser.add_argument("name")
+    diff_parser.add_argument("old", type=int)
+    diff_parser.add_argument("new", type=int)
+    add_parser = subparsers.add_parser("add", help="archive a file as a new version")
+    add_parser.add_argument("name")
+    add_parser.add_argument("path")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        manifest = load_manifest(args.name)
+        for entry in manifest:
+            print(f"{entry['version']:>5}  {entry['saved_at']}  {entry['size']:>10} bytes  {entry['sha256'][:12]}")
+        print(f"{len(manifest)} versions, {disk_usage(args.name)} bytes on disk.")
+    elif args.command == "show":
+        sys.stdout.buffer.write(get_version(args.name, args.version))
+    elif args.command == "diff":
+        sys.stdout.writelines(diff_versions(args.name, args.old, args.new))
+    else:
+        with open(args.path, "rb") as f:
+            entry = add_version(args.name, f.read())
+        print(f"Archived version {entry['version']} of {args.name}." if entry else f"{args.name} unchanged.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+def make_record(date, price=10, sold=1, offers=0, stats_date=None):
+    """
+    Record della cronologia nel formato dello store (valori stringa, senza
+    dayOffset). Di default lo statsDate coincide con 'date'.
+    """
+    return {
+        "averagePrice": str(price),
+        "totalSoldItems": str(sold),
+        "totalCreditSum": str(price * sold),
+        "totalOpenOffers": str(offers),
+        "statsDate": stats_date or date,
+        "date": date,
+    }
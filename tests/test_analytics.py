@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+import analytics
+import history_columnar
+from tests.conftest import make_record
+
+
+STATS = {
+    "chair": [make_record("2025-02-01", 10, 1, offers=1), make_record("2025-02-03", 20, 2, offers=1)],
+    "table": [make_record("2025-02-02", 5, 4, offers=1)],
+}
+
+
+def test_build_matrices():
+    matrices = analytics.build_matrices(history_columnar.to_columnar(STATS))
+    assert list(matrices["classnames"]) == ["chair", "table"]
+    assert len(matrices["days"]) == 3
+    np.testing.assert_array_equal(matrices["totalSoldItems"], [[1, 0, 2], [0, 4, 0]])
+    np.testing.assert_array_equal(matrices["averagePrice"], [[10, np.nan, 20], [np.nan, 5, np.nan]])
+
+
+def test_build_matrices_with_window():
+    end_day = history_columnar.date_to_day("2025-02-04")
+    matrices = analytics.build_matrices(history_columnar.to_columnar(STATS), days=2, end_day=end_day)
+    np.testing.assert_array_equal(matrices["days"], [end_day - 1, end_day])
+    np.testing.assert_array_equal(matrices["totalSoldItems"], [[2, 0], [0, 0]])
+
+
+def test_end_day_before_first_record_gives_empty_column():
+    end_day = history_columnar.date_to_day("2025-01-01")
+    matrices = analytics.build_matrices(history_columnar.to_columnar(STATS), end_day=end_day)
+    np.testing.assert_array_equal(matrices["days"], [end_day])
+    assert np.isnan(matrices["averagePrice"]).all()
+    assert not matrices["totalSoldItems"].any()
+
+
+def test_empty_store():
+    matrices = analytics.build_matrices(history_columnar.to_columnar({}))
+    assert matrices["averagePrice"].shape == (0, 1)
+
+
+@pytest.mark.parametrize("days", [0, -3])
+def test_invalid_days_are_rejected(days):
+    with pytest.raises(ValueError):
+        analytics.build_matrices(history_columnar.to_columnar(STATS), days=days)
@@ -0,0 +1,62 @@
+import datetime
+
+import anomalies
+import analytics
+import history_columnar
+from tests.conftest import make_record
+
+END = datetime.date(2025, 3, 31)
+DAYS = anomalies.WINDOW + anomalies.CHECK_DAYS
+
+
+def _history(daily):
+    """
+    'daily': lista di (prezzo, venduti) per i DAYS giorni fino a END (None = nessun record).
+    """
+    history = []
+    for offset, values in enumerate(daily):
+        if values is None:
+            continue
+        price, sold = values
+        date = (END - datetime.timedelta(days=len(daily) - 1 - offset)).isoformat()
+        history.append(make_record(date, price, sold, offers=1, stats_date=END.isoformat()))
+    return history
+
+
+def _detect(stats):
+    arrays = history_columnar.to_columnar(stats)
+    matrices = analytics.build_matrices(arrays, days=DAYS, end_day=history_columnar.date_to_day(END.isoformat()))
+    return {(anomaly["classname"], anomaly["field"]) for anomaly in anomalies.detect(matrices)}
+
+
+def test_busy_item_volume_spike_is_flagged():
+    daily = [(100, 10 + offset % 3) for offset in range(DAYS - 1)] + [(100, 120)]
+    assert _detect({"busy": _history(daily)}) == {("busy", "totalSoldItems")}
+
+
+def test_sparse_volume_item_is_not_flagged():
+    # Poche vendite isolate nella finestra, poi qualche vendita in più del solito
+    baseline = [None] * (DAYS - 1)
+    for offset in (3, 11, 20, 27):
+        baseline[offset] = (500, 1)
+    stats = {
+        "sparse": _history(baseline + [(500, 6)]),
+        # Nessuna vendita nella finestra: MIN_SOLD vendite non bastano
+        "silent": _history([None] * (DAYS - 1) + [(500, anomalies.MIN_SOLD)]),
+    }
+    assert _detect(stats) == set()
+
+
+def test_silent_item_with_large_volume_is_flagged():
+    volume = int(anomalies.THRESHOLD * anomalies.VOLUME_MIN_SCALE)
+    assert _detect({"silent": _history([None] * (DAYS - 1) + [(500, volume)])}) == {("silent", "totalSoldItems")}
+
+
+def test_price_spike_is_flagged():
+    daily = [(1000 + (offset % 5) * 10, 2) for offset in range(DAYS - 1)] + [(5000, 2)]
+    assert _detect({"rare": _history(daily)}) == {("rare", "averagePrice")}
+
+
+def test_small_price_change_on_flat_price_is_not_flagged():
+    daily = [(1000, 2)] * (DAYS - 1) + [(1100, 2)]
+    assert _detect({"flat": _history(daily)}) == set()
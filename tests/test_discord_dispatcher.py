@@ -0,0 +1,38 @@
+import discord_dispatcher
+
+
+def _embed(length):
+    return {"title": "t", "description": "x" * (length - 1)}
+
+
+def test_pack_embeds_respects_embed_count():
+    batches = discord_dispatcher.pack_embeds([_embed(10)] * 25)
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+
+
+def test_pack_embeds_respects_message_length():
+    batches = discord_dispatcher.pack_embeds([_embed(2500)] * 5)
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    for batch in batches:
+        assert sum(discord_dispatcher.embed_length(embed) for embed in batch) <= discord_dispatcher.MAX_CHARS_PER_MESSAGE
+
+
+def test_pack_embeds_keeps_order():
+    embeds = [{"title": str(i)} for i in range(15)]
+    batches = discord_dispatcher.pack_embeds(embeds)
+    assert [embed["title"] for batch in batches for embed in batch] == [str(i) for i in range(15)]
+
+
+def test_long_embeds_are_truncated():
+    embed = {"title": "t" * 300, "description": "d" * 5000}
+    (batch,) = discord_dispatcher.pack_embeds([embed])
+    assert len(batch[0]["title"]) == discord_dispatcher.MAX_TITLE_LENGTH
+    assert len(batch[0]["description"]) == discord_dispatcher.MAX_DESCRIPTION_LENGTH
+    assert batch[0]["description"].endswith("…")
+    # L'embed originale non viene modificato
+    assert len(embed["description"]) == 5000
+
+
+def test_embed_length_counts_fields_footer_and_author():
+    embed = {"title": "ab", "description": "c", "footer": {"text": "de"}, "author": {"name": "f"}, "fields": [{"name": "g", "value": "hi"}]}
+    assert discord_dispatcher.embed_length(embed) == 9
@@ -0,0 +1,66 @@
+import csv
+import datetime
+import os
+import sqlite3
+
+import export_stats
+import history_store
+from tests.conftest import make_record
+
+CURRENT_DATE = datetime.date(2025, 3, 1)
+
+
+def _export(tmp_path, stats):
+    store_dir = str(tmp_path / "store")
+    history_store.save(stats, None, store_dir, None)
+    return export_stats.export(str(tmp_path / "exports"), CURRENT_DATE, store_dir, None, ("csv", "sqlite"))
+
+
+def test_export_writes_csv_and_sqlite(tmp_path):
+    stats = {"chair": [make_record("2025-02-27"), make_record("2025-02-28", 20)], "table": [make_record("2025-02-28", 5, 3)]}
+    assert _export(tmp_path, stats) == ["2025-02-27", "2025-02-28"]
+
+    with open(tmp_path / "exports" / "csv" / "2025-02-28.csv", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["classname"], row["averagePrice"], row["totalSoldItems"]) for row in rows] == [("chair", "20", "1"), ("table", "5", "3")]
+
+    connection = sqlite3.connect(tmp_path / "exports" / export_stats.SQLITE_FILE)
+    assert connection.execute("SELECT COUNT(*) FROM records").fetchone() == (3,)
+    assert connection.execute("SELECT averagePrice FROM records WHERE classname = 'chair' AND date = '2025-02-27'").fetchone() == (10,)
+    indexes = {row[1] for row in connection.execute("PRAGMA index_list(records)")}
+    assert "records_date" in indexes
+    connection.close()
+
+
+def test_export_is_incremental(tmp_path):
+    stats = {"chair": [make_record("2025-02-27")], "table": [make_record("2025-02-27")]}
+    _export(tmp_path, stats)
+    assert _export(tmp_path, stats) == []
+
+    # Un giorno nuovo e un record arrivato in ritardo per un giorno già esportato
+    stats["chair"].append(make_record("2025-02-28"))
+    stats["lamp"] = [make_record("2025-02-27")]
+    assert _export(tmp_path, stats) == ["2025-02-27", "2025-02-28"]
+    connection = sqlite3.connect(tmp_path / "exports" / export_stats.SQLITE_FILE)
+    assert connection.execute("SELECT COUNT(*) FROM records WHERE date = '2025-02-27'").fetchone() == (3,)
+    connection.close()
+
+
+def test_days_before_the_api_window_are_not_reread(tmp_path):
+    old_day = (CURRENT_DATE - datetime.timedelta(days=history_store.HISTORY_LIMIT + 5)).isoformat()
+    stats = {"chair": [make_record(old_day), make_record("2025-02-28")]}
+    _export(tmp_path, stats)
+    seen = []
+
+    def wanted_days(shards, wanted):
+        seen.extend(day for day in (old_day, "2025-02-28") if wanted(day))
+        return {}
+
+    original = export_stats.rows_by_date
+    export_stats.rows_by_date = wanted_days
+    try:
+        export_stats.export(str(tmp_path / "exports"), CURRENT_DATE, str(tmp_path / "store"), None, ("csv", "sqlite"))
+    finally:
+        export_stats.rows_by_date = original
+    assert seen == ["2025-02-28"]
+    assert os.path.exists(tmp_path / "exports" / "csv" / f"{old_day}.csv")
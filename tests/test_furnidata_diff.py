@@ -0,0 +1,47 @@
+from furnidata import furnidata
+
+
+def _furnidata(room, wall=()):
+    return {"roomitemtypes": {"furnitype": list(room)}, "wallitemtypes": {"furnitype": list(wall)}}
+
+
+def test_diff_by_id():
+    old = _furnidata(
+        [{"id": 1, "classname": "chair", "name": "Chair"}, {"id": 2, "classname": "table", "name": "Table"}],
+        [{"id": 1, "classname": "poster", "name": "Poster"}],
+    )
+    new = _furnidata(
+        # Ordine diverso e un nome modificato
+        [{"id": 3, "classname": "lamp", "name": "Lamp"}, {"id": 1, "classname": "chair", "name": "Armchair"}],
+        [{"id": 1, "classname": "poster", "name": "Poster"}],
+    )
+    diff = furnidata.diff_furnidata(old, new)
+    assert diff["added"] == [("roomitemtypes", {"id": 3, "classname": "lamp", "name": "Lamp"})]
+    assert diff["removed"] == [("roomitemtypes", {"id": 2, "classname": "table", "name": "Table"})]
+    assert len(diff["changed"]) == 1
+    section, old_obj, new_obj, modifications = diff["changed"][0]
+    assert section == "roomitemtypes"
+    assert old_obj["name"] == "Chair" and new_obj["name"] == "Armchair"
+    assert modifications == {"name": {"old": "Chair", "new": "Armchair"}}
+    assert furnidata.has_changes(diff)
+
+
+def test_same_id_in_different_sections_is_not_matched():
+    old = _furnidata([{"id": 1, "classname": "chair"}])
+    new = _furnidata([], [{"id": 1, "classname": "chair"}])
+    diff = furnidata.diff_furnidata(old, new)
+    assert diff["added"] == [("wallitemtypes", {"id": 1, "classname": "chair"})]
+    assert diff["removed"] == [("roomitemtypes", {"id": 1, "classname": "chair"})]
+
+
+def test_added_and_removed_fields_are_modifications():
+    old = _furnidata([{"id": 1, "classname": "chair", "rare": False}])
+    new = _furnidata([{"id": 1, "classname": "chair", "buyout": True}])
+    _, _, _, modifications = furnidata.diff_furnidata(old, new)["changed"][0]
+    assert modifications == {"buyout": {"old": None, "new": True}, "rare": {"old": False, "new": None}}
+
+
+def test_items_without_id_are_keyed_by_classname():
+    old = _furnidata([{"classname": "chair", "name": "Chair"}])
+    new = _furnidata([{"classname": "chair", "name": "Chair"}])
+    assert not furnidata.has_changes(furnidata.diff_furnidata(old, new))
@@ -0,0 +1,76 @@
+import copy
+
+import furnidata_lifecycle
+from furnidata import furnidata
+
+OLD = {
+    "roomitemtypes": {"furnitype": [
+        {"id": 1, "classname": "chair", "name": "Chair", "furniline": None},
+        {"id": 2, "classname": "table", "name": "Table", "rare": False},
+        {"id": 3, "classname": "lamp", "name": "Lamp"},
+    ]},
+    "wallitemtypes": {"furnitype": [{"id": 1, "classname": "poster", "name": "Poster"}]},
+}
+
+
+def _updated():
+    data = copy.deepcopy(OLD)
+    room = data["roomitemtypes"]["furnitype"]
+    room[0]["name"] = "Armchair"
+    room[0]["furniline"] = "classic"
+    del room[1]["rare"]
+    room[1]["buyout"] = None
+    room[2]["classname"] = "lamp_new"
+    room.append({"id": 4, "classname": "sofa", "name": "Sofa"})
+    del data["wallitemtypes"]["furnitype"][0]
+    return data
+
+
+def _index(tmp_path):
+    path = str(tmp_path / "lifecycle.json")
+    new = _updated()
+    furnidata_lifecycle.record_update(None, OLD, None, "2025-01-01T10:00:00", path)
+    furnidata_lifecycle.record_update(OLD, new, furnidata.diff_furnidata(OLD, new), "2025-02-01T10:00:00", path)
+    return furnidata_lifecycle.load_lifecycle(path)
+
+
+def _catalogue(index, when):
+    return {item["classname"]: item for item in furnidata_lifecycle.catalogue_as_of(index, when)}
+
+
+def test_catalogue_as_of(tmp_path):
+    index = _index(tmp_path)
+    before = _catalogue(index, "2025-01-15")
+    after = _catalogue(index, "2025-02-01")
+    assert sorted(before) == ["chair", "lamp", "poster", "table"]
+    assert sorted(after) == ["chair", "lamp_new", "sofa", "table"]
+    assert before["chair"]["name"] == "Chair" and after["chair"]["name"] == "Armchair"
+    assert _catalogue(index, "2024-12-31") == {}
+
+
+def test_null_fields_survive_in_past_catalogues(tmp_path):
+    index = _index(tmp_path)
+    before = _catalogue(index, "2025-01-15")
+    after = _catalogue(index, "2025-02-01")
+    # Un valore null è diverso da un campo assente
+    assert "furniline" in before["chair"] and before["chair"]["furniline"] is None
+    assert after["chair"]["furniline"] == "classic"
+    assert before["table"]["rare"] is False and "buyout" not in before["table"]
+    assert "rare" not in after["table"] and "buyout" in after["table"] and after["table"]["buyout"] is None
+
+
+def test_item_history(tmp_path):
+    index = _index(tmp_path)
+    chair = furnidata_lifecycle.item_history(index, "chair")
+    assert chair["present"] and chair["last_seen"] == "2025-02-01T10:00:00"
+    assert {(event["field"], event["change"]) for event in chair["events"]} == {("name", "modified"), ("furniline", "modified")}
+
+    table = furnidata_lifecycle.item_history(index, "table")
+    assert {(event["field"], event["change"]) for event in table["events"]} == {("rare", "removed"), ("buyout", "added")}
+    added = next(event for event in table["events"] if event["change"] == "added")
+    assert "old" not in added and added["new"] is None
+
+    poster = furnidata_lifecycle.item_history(index, "poster")
+    assert not poster["present"]
+    assert poster["intervals"] == [["2025-01-01T10:00:00", "2025-02-01T10:00:00"]]
+    assert furnidata_lifecycle.item_history(index, "missing") is None
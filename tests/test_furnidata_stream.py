@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+import furnidata_stream
+
+FURNIDATA = {
+    "roomitemtypes": {"furnitype": [
+        {"id": 1, "classname": "chair", "name": "Sedia è ☃", "partcolors": {"color": ["#fff", "#000"]}},
+        {"id": 2, "classname": "table", "name": "Tavolo con \"virgolette\" e ] { }"},
+    ]},
+    "wallitemtypes": {"furnitype": [
+        {"id": 3, "classname": "poster", "name": "Poster"},
+    ]},
+}
+
+
+def _chunks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+def _expected():
+    return [(section, item) for section in ("roomitemtypes", "wallitemtypes") for item in FURNIDATA[section]["furnitype"]]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 4096])
+def test_round_trip_across_chunk_boundaries(chunk_size):
+    data = json.dumps(FURNIDATA, ensure_ascii=False, indent=2).encode("utf-8")
+    assert list(furnidata_stream.iter_furnitypes(_chunks(data, chunk_size))) == _expected()
+
+
+def test_compact_json():
+    data = json.dumps(FURNIDATA, separators=(",", ":")).encode("utf-8")
+    assert list(furnidata_stream.iter_furnitypes(_chunks(data, 5))) == _expected()
+
+
+def test_empty_sections():
+    data = b'{"roomitemtypes": {"furnitype": []}, "wallitemtypes": {"furnitype": [ ]}}'
+    assert list(furnidata_stream.iter_furnitypes(_chunks(data, 3))) == []
+
+
+def test_truncated_input_raises():
+    data = json.dumps(FURNIDATA).encode("utf-8")[:-40]
+    with pytest.raises(ValueError):
+        list(furnidata_stream.iter_furnitypes(_chunks(data, 16)))
@@ -0,0 +1,80 @@
+import datetime
+
+import gap_scanner
+from tests.conftest import make_record
+
+FIRST = datetime.date(2025, 2, 1)
+LAST_COLLECTED = datetime.date(2025, 2, 20)
+
+
+def _daily_stats(items=100, skip=None):
+    """
+    'items' items scambiati ogni giorno da FIRST a LAST_COLLECTED, raccolti
+    l'ultima volta il giorno dopo. 'skip': giorno -> numero di items con record.
+    """
+    stats_date = (LAST_COLLECTED + datetime.timedelta(days=1)).isoformat()
+    skip = skip or {}
+    stats = {}
+    for i in range(items):
+        history = []
+        day = FIRST
+        while day <= LAST_COLLECTED:
+            if i < skip.get(day, items):
+                history.append(make_record(day.isoformat(), stats_date=stats_date))
+            day += datetime.timedelta(days=1)
+        stats[f"item_{i}"] = history
+    return stats
+
+
+def test_complete_history_has_no_gaps():
+    report = gap_scanner.scan(_daily_stats(), {}, LAST_COLLECTED + datetime.timedelta(days=1))
+    assert report["missing_dates"] == []
+    assert report["overdue_items"] == []
+
+
+def test_partial_day_is_missing():
+    stats = _daily_stats(skip={datetime.date(2025, 2, 10): 5})
+    dates = gap_scanner.missing_dates(stats, LAST_COLLECTED + datetime.timedelta(days=1))
+    assert dates == [{"date": "2025-02-10", "records": 5, "recoverable": True}]
+
+
+def test_outage_longer_than_the_collected_history_is_reported():
+    # Raccolta ferma dal 21 febbraio al 20 marzo: più di metà della cronologia
+    report = gap_scanner.scan(_daily_stats(), {}, datetime.date(2025, 3, 21))
+    missing = [day["date"] for day in report["missing_dates"]]
+    assert missing[0] == "2025-02-21" and missing[-1] == "2025-03-20" and len(missing) == 28
+    assert report["lost_dates"] == 0
+
+    report = gap_scanner.scan(_daily_stats(), {}, datetime.date(2025, 4, 10))
+    assert report["lost_dates"] == 18
+    assert [day["date"] for day in report["missing_dates"] if day["recoverable"]][0] == "2025-03-11"
+
+
+def test_items_without_poll_state_are_overdue_from_their_last_stats_date():
+    stats = _daily_stats(items=3)
+    stats["never_traded"] = []
+    overdue = gap_scanner.overdue_items(stats, {"item_2": "2025-03-20"}, datetime.date(2025, 3, 21))
+    assert [item["classname"] for item in overdue] == ["item_0", "item_1"]
+    assert overdue[0]["last_polled"] == "2025-02-21"
+    assert overdue[0]["uncollected_days"] == 28
+    assert overdue[0]["lost_days"] == 0
+
+
+def test_backfill_targets_after_an_outage():
+    stats = _daily_stats(items=3)
+    current_date = datetime.date(2025, 3, 21)
+    report = gap_scanner.scan(stats, {}, current_date)
+    classnames, fill_dates = gap_scanner.backfill_targets(stats, report, current_date)
+    assert classnames == {"item_0", "item_1", "item_2"}
+    assert len(fill_dates) == 28 and "2025-02-21" in fill_dates
+
+
+def test_backfill_does_not_refill_lost_days():
+    stats = _daily_stats(items=3)
+    # Ultimo fetch oltre HISTORY_LIMIT giorni fa: solo gli ultimi giorni sono recuperabili
+    report = gap_scanner.scan(stats, {}, datetime.date(2025, 4, 10))
+    report["missing_dates"] = [day for day in report["missing_dates"] if not day["recoverable"]]
+    assert all(item["lost_days"] == 18 for item in report["overdue_items"])
+    classnames, fill_dates = gap_scanner.backfill_targets(stats, report, datetime.date(2025, 4, 10))
+    assert classnames == {"item_0", "item_1", "item_2"}
+    assert fill_dates == set()
@@ -0,0 +1,51 @@
+import pytest
+
+import history_columnar
+import history_mmap
+from tests.conftest import make_record
+
+STATS = {
+    "chair": [
+        make_record("2025-02-12", 20, 2, offers=1, stats_date="2025-02-13"),
+        make_record("2025-02-10", 10, 1, offers=3, stats_date="2025-02-13"),
+    ],
+    "chair_plasto": [],
+    "sedia_è": [make_record("2025-02-11", 5, 1, stats_date="2025-02-13")],
+    "table": [make_record("2025-02-12", 7, 3, stats_date="2025-02-13")],
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    path = str(tmp_path / "history.bin")
+    assert history_mmap.build(STATS, path) == (4, 4)
+    with history_mmap.MappedHistory(path) as store:
+        yield store
+
+
+def test_matches_columnar_format(store):
+    expected = history_columnar.from_columnar(history_columnar.to_columnar(STATS))
+    for classname, history in expected.items():
+        assert store.get(classname) == sorted(history, key=lambda record: record["date"])
+
+
+def test_lookups(store):
+    assert len(store) == 4
+    assert store.find("missing") == -1
+    assert store.get("missing") is None
+    assert store.get("chair_plasto") == []
+    assert store.classnames("chair") == ["chair", "chair_plasto"]
+    assert store.classnames("sedia") == ["sedia_è"]
+    assert store.classnames() == sorted(STATS)
+
+
+def test_date_filters(store):
+    assert [record["date"] for record in store.get("chair", since="2025-02-11")] == ["2025-02-12"]
+    assert [record["date"] for record in store.get("chair", until="2025-02-11")] == ["2025-02-10"]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        history_mmap.MappedHistory(str(path))
@@ -0,0 +1,60 @@
+import datetime
+import json
+import os
+
+import history_store
+from tests.conftest import make_record
+
+
+def test_record_date_prefers_date_field():
+    assert history_store.record_date({"date": "2025-02-10", "statsDate": "2025-02-13", "dayOffset": "-1"}) == datetime.date(2025, 2, 10)
+
+
+def test_record_date_from_legacy_day_offset():
+    assert history_store.record_date({"statsDate": "2025-02-13", "dayOffset": "-3"}) == datetime.date(2025, 2, 10)
+
+
+def test_day_offset_is_capped_at_history_limit():
+    current_date = datetime.date(2025, 2, 13)
+    assert history_store.day_offset(make_record("2025-02-12"), current_date) == -1
+    assert history_store.day_offset(make_record("2024-01-01"), current_date) == -history_store.HISTORY_LIMIT
+
+
+def test_shard_name():
+    assert history_store.shard_name("Shelves_Norja") == "she"
+    assert history_store.shard_name("a") == "a__"
+    assert history_store.shard_name("a-b*1") == "a_b"
+
+
+def test_save_migrates_legacy_file(tmp_path):
+    store_dir = str(tmp_path / "store")
+    legacy_file = str(tmp_path / "legacy.json")
+    stats = {
+        "shelves_norja": [{"averagePrice": "10", "totalSoldItems": "1", "statsDate": "2025-02-13", "dayOffset": "-2"}],
+        "chair_plasto": [make_record("2025-02-12")],
+    }
+    with open(legacy_file, "w", encoding="utf-8") as f:
+        json.dump(stats, f)
+
+    assert history_store.needs_migration(store_dir, legacy_file)
+    loaded = history_store.load_all(store_dir, legacy_file)
+    assert loaded["shelves_norja"][0]["date"] == "2025-02-11"
+    assert "dayOffset" not in loaded["shelves_norja"][0]
+
+    assert history_store.save(loaded, {"chair_plasto"}, store_dir, legacy_file) == 2
+    assert not os.path.exists(legacy_file)
+    assert sorted(os.listdir(store_dir)) == ["cha.json", "she.json"]
+    assert history_store.load_all(store_dir, legacy_file) == loaded
+
+
+def test_save_rewrites_only_changed_shards(tmp_path):
+    store_dir = str(tmp_path / "store")
+    stats = {"chair_plasto": [make_record("2025-02-12")], "shelves_norja": [make_record("2025-02-12")]}
+    history_store.save(stats, None, store_dir, None)
+
+    stats["chair_plasto"].append(make_record("2025-02-13"))
+    stats["shelves_norja"].append(make_record("2025-02-13"))
+    assert history_store.save(stats, {"chair_plasto"}, store_dir, None) == 1
+    assert len(history_store.load_item("chair_plasto", store_dir, None)) == 2
+    assert len(history_store.load_item("shelves_norja", store_dir, None)) == 1
+    assert history_store.load_items(["shelves_norja", "missing"], store_dir, None).keys() == {"shelves_norja"}
@@ -0,0 +1,25 @@
+import keyvalue_diff
+
+
+def test_parse_key_values_counts_repeated_keys():
+    values = keyvalue_diff.parse_key_values("a=1\n\nb=2=3\na=4\nflag\n")
+    assert values == {("a", 0): "1", ("b", 0): "2=3", ("a", 1): "4", ("flag", 0): ""}
+    assert list(values) == [("a", 0), ("b", 0), ("a", 1), ("flag", 0)]
+
+
+def test_diff_ignores_line_order():
+    assert keyvalue_diff.diff_texts("a=1\nb=2\n", "b=2\na=1\n") == {"added": [], "removed": [], "changed": []}
+
+
+def test_diff_by_key_and_occurrence():
+    diff = keyvalue_diff.diff_texts("a=1\na=2\nb=3\n", "a=1\na=5\nc=6\n")
+    assert diff == {
+        "added": [(("c", 0), "6")],
+        "removed": [(("b", 0), "3")],
+        "changed": [(("a", 1), "2", "5")],
+    }
+
+
+def test_format_diff_lines():
+    diff = keyvalue_diff.diff_texts("a=1\nb=3\n", "a=2\nc=6\n")
+    assert keyvalue_diff.format_diff_lines(diff) == (["+c=6"], ["-b=3"], ["-a=1\n+a=2"])
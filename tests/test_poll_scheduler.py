@@ -0,0 +1,61 @@
+import datetime
+import importlib
+
+import pytest
+
+import poll_scheduler
+from tests.conftest import make_record
+
+CURRENT_DATE = datetime.date(2025, 2, 13)
+
+
+def test_classify():
+    assert poll_scheduler.classify([make_record("2025-02-10", sold=2)], CURRENT_DATE) == "active"
+    assert poll_scheduler.classify([make_record("2025-01-20", sold=2)], CURRENT_DATE) == "warm"
+    assert poll_scheduler.classify([make_record("2024-12-01", sold=2), make_record("2025-02-12", sold=0, offers=3)], CURRENT_DATE) == "warm"
+    assert poll_scheduler.classify([make_record("2024-12-01", sold=2)], CURRENT_DATE) == "dormant"
+    assert poll_scheduler.classify([], CURRENT_DATE) == "dormant"
+
+
+def test_coverage_date():
+    history = [make_record("2025-01-31", stats_date="2025-02-01")]
+    assert poll_scheduler.coverage_date(history, None) == datetime.date(2025, 2, 1)
+    assert poll_scheduler.coverage_date(history, "2025-02-10") == datetime.date(2025, 2, 10)
+    assert poll_scheduler.coverage_date(history, "2025-01-15") == datetime.date(2025, 2, 1)
+    assert poll_scheduler.coverage_date([], None) is None
+
+
+def test_new_or_never_polled_items_are_due():
+    all_stats = {"chair": [make_record("2025-02-12", sold=1)]}
+    assert poll_scheduler.is_due("table", all_stats, {}, CURRENT_DATE)
+    assert poll_scheduler.is_due("chair", all_stats, {}, CURRENT_DATE)
+
+
+def test_polled_today_is_not_due():
+    all_stats = {"chair": [make_record("2025-02-12", sold=1)]}
+    assert not poll_scheduler.is_due("chair", all_stats, {"chair": CURRENT_DATE.isoformat()}, CURRENT_DATE)
+
+
+@pytest.mark.parametrize("classname", ["chair", "table", "lamp", "poster", "sofa"])
+def test_dormant_items_are_polled_once_per_interval(classname):
+    interval = poll_scheduler.POLL_INTERVALS["dormant"]
+    all_stats = {classname: [make_record("2024-10-01", sold=1)]}
+    poll_state = {classname: "2025-01-01"}
+    due_days = []
+    current_date = datetime.date(2025, 1, 1)
+    for _ in range(60):
+        current_date += datetime.timedelta(days=1)
+        if poll_scheduler.is_due(classname, all_stats, poll_state, current_date):
+            due_days.append(current_date)
+            poll_state[classname] = current_date.isoformat()
+    gaps = [(later - earlier).days for earlier, later in zip(due_days, due_days[1:])]
+    assert (due_days[0] - datetime.date(2025, 1, 1)).days <= interval
+    assert gaps and all(gap == interval for gap in gaps)
+
+
+def test_intervals_beyond_history_limit_are_rejected(monkeypatch):
+    monkeypatch.setenv("POLL_INTERVAL_DORMANT", "45")
+    with pytest.raises(ValueError):
+        importlib.reload(poll_scheduler)
+    monkeypatch.delenv("POLL_INTERVAL_DORMANT")
+    importlib.reload(poll_scheduler)
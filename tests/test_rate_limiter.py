@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+from rate_limiter import TokenBucket
+
+
+def _acquire(bucket, count=1):
+    async def acquire_all():
+        return [await bucket.acquire() for _ in range(count)]
+    return asyncio.run(acquire_all())
+
+
+def test_acquire_spends_tokens_at_the_configured_rate():
+    bucket = TokenBucket(20, capacity=2)
+    start = time.monotonic()
+    granted = _acquire(bucket, 4)
+    # Due token disponibili subito, poi uno ogni 1/20 di secondo
+    assert time.monotonic() - start >= 0.09
+    assert granted == sorted(granted)
+
+
+def test_acquire_waits_for_the_penalty_pause():
+    bucket = TokenBucket(100)
+    bucket.penalize(retry_after="0.1")
+    start = time.monotonic()
+    _acquire(bucket)
+    assert time.monotonic() - start >= 0.09
+
+
+def test_concurrent_429s_cut_the_rate_once():
+    bucket = TokenBucket(4, capacity=8)
+    granted = _acquire(bucket, 8)
+    for acquired_at in granted:
+        bucket.penalize(retry_after="0", acquired_at=acquired_at)
+    assert bucket.rate == 2
+
+
+def test_429_during_the_pause_does_not_cut_the_rate_again():
+    bucket = TokenBucket(4)
+    assert bucket.penalize(retry_after="60") == 60
+    bucket.penalize(retry_after="60")
+    assert bucket.rate == 2
+
+
+def test_new_congestion_cuts_the_rate_again():
+    bucket = TokenBucket(4)
+    bucket.penalize(retry_after="0", acquired_at=_acquire(bucket)[0])
+    bucket.penalize(retry_after="0", acquired_at=_acquire(bucket)[0])
+    assert bucket.rate == 1
+
+
+def test_penalize_respects_min_rate_and_default_pause():
+    bucket = TokenBucket(0.3, min_rate=0.2)
+    assert bucket.penalize(retry_after="soon") == TokenBucket.PENALTY_SECONDS
+    assert bucket.rate == 0.2
+    assert bucket.capacity == 1.0
+
+
+def test_reward_increases_the_rate_up_to_max_rate():
+    bucket = TokenBucket(4, max_rate=4.1)
+    bucket.reward()
+    assert bucket.rate == 4 + 4 * TokenBucket.INCREASE_RATIO
+    bucket.reward()
+    bucket.reward()
+    assert bucket.rate == 4.1
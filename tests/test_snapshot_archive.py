@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+import snapshot_archive
+
+
+def _round_trip(base, new):
+    base_lines = base.splitlines(keepends=True)
+    delta = snapshot_archive.encode_delta(snapshot_archive.compute_delta(base_lines, new.splitlines(keepends=True)))
+    return snapshot_archive.apply_delta(base_lines, delta), delta
+
+
+@pytest.mark.parametrize("base, new", [
+    (b"", b""),
+    (b"", b"a\nb\n"),
+    (b"a\nb\n", b""),
+    (b"a\nb\nc\n", b"a\nb\nc\n"),
+    (b"a\nb\nc\n", b"a\nx\nc\n"),
+    (b"a\nb\nc", b"a\nb\nc\nd"),
+    (b"a\na\na\nb\n", b"b\na\na\n"),
+    (b"I 3\nC 0 1\n", b"C 0 1\nI 3\n\n"),
+])
+def test_delta_round_trip(base, new):
+    assert _round_trip(base, new)[0] == new
+
+
+def test_delta_round_trip_random_edits():
+    rng = random.Random(7)
+    lines = [f"line {i}\n".encode() for i in range(500)]
+    for _ in range(50):
+        new = list(lines)
+        for _ in range(rng.randint(1, 20)):
+            position = rng.randrange(len(new))
+            action = rng.choice(("insert", "delete", "replace"))
+            if action == "insert":
+                new.insert(position, f"new {rng.random()}\n".encode())
+            elif action == "delete":
+                del new[position]
+            else:
+                new[position] = f"changed {rng.random()}\n".encode()
+        assert _round_trip(b"".join(lines), b"".join(new))[0] == b"".join(new)
+
+
+def test_small_change_gives_small_delta():
+    base = b"".join(f"line {i}\n".encode() for i in range(10000))
+    new = base.replace(b"line 5000\n", b"line 5000 changed\n")
+    result, delta = _round_trip(base, new)
+    assert result == new
+    assert len(delta) < 100
+
+
+def test_add_and_read_versions(tmp_path):
+    archive_dir = str(tmp_path)
+    versions = [b"".join(f"{i} {j}\n".encode() for j in range(100)) for i in range(3)] + [b"0 0\n"]
+    for content in versions:
+        assert snapshot_archive.add_version("source", content, archive_dir) is not None
+    assert snapshot_archive.add_version("source", versions[-1], archive_dir) is None
+    manifest = snapshot_archive.load_manifest("source", archive_dir)
+    assert [entry["version"] for entry in manifest] == [1, 2, 3, 4]
+    for number, content in enumerate(versions, start=1):
+        assert snapshot_archive.get_version("source", number, archive_dir) == content
+    assert snapshot_archive.get_version("source", -1, archive_dir) == versions[-1]
+
+
+def test_keyframe_interval_limits_delta_chains(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshot_archive, "KEYFRAME_INTERVAL", 3)
+    archive_dir = str(tmp_path)
+    for i in range(7):
+        snapshot_archive.add_version("source", f"header\nversion {i}\n".encode(), archive_dir)
+    manifest = snapshot_archive.load_manifest("source", archive_dir)
+    chains = [snapshot_archive._chain_length("source", entry["sha256"], archive_dir) for entry in manifest]
+    assert chains == [0, 1, 2, 0, 1, 2, 0]
+    assert snapshot_archive.get_version("source", 5, archive_dir) == b"header\nversion 4\n"
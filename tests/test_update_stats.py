@@ -0,0 +1,72 @@
+import datetime
+
+import update_stats
+from tests.conftest import make_record
+
+CURRENT_DATE = datetime.date(2025, 2, 13)
+
+
+def _api_result(day_offsets, stats_date=CURRENT_DATE.isoformat()):
+    """
+    Risposta dell'API: record con solo dayOffset, relativi a 'stats_date'.
+    """
+    history = [
+        {"averagePrice": "10", "totalSoldItems": "1", "totalCreditSum": "10", "totalOpenOffers": "0", "dayOffset": str(offset)}
+        for offset in day_offsets
+    ]
+    return {"statsDate": stats_date, "history": history}
+
+
+def _dates(history):
+    return [record["date"] for record in history]
+
+
+def test_assign_dates():
+    records = [{"dayOffset": "-3"}, {"dayOffset": "-1", "date": "2025-02-01"}, {}]
+    update_stats.assign_dates(records, "2025-02-13")
+    assert _dates(records) == ["2025-02-10", "2025-02-01", "2025-02-13"]
+    assert all("dayOffset" not in record for record in records)
+
+
+def test_new_item_gets_the_whole_history():
+    all_stats = {}
+    assert update_stats.merge_api_result(all_stats, "chair", _api_result([-3, -1]), CURRENT_DATE)
+    assert _dates(all_stats["chair"]) == ["2025-02-10", "2025-02-12"]
+    assert all(record["statsDate"] == "2025-02-13" and "dayOffset" not in record for record in all_stats["chair"])
+
+
+def test_item_polled_days_ago_gets_exactly_the_missing_records():
+    # Ultimo fetch il 9: i dati fino all'8 sono già raccolti
+    all_stats = {"chair": [make_record("2025-02-05", stats_date="2025-02-09"), make_record("2025-02-08", stats_date="2025-02-09")]}
+    api_result = _api_result(range(-10, 0))
+    assert update_stats.merge_api_result(all_stats, "chair", api_result, CURRENT_DATE, last_polled="2025-02-09")
+    assert _dates(all_stats["chair"]) == ["2025-02-05", "2025-02-08", "2025-02-09", "2025-02-10", "2025-02-11", "2025-02-12"]
+    assert all("dayOffset" not in record for record in all_stats["chair"])
+
+
+def test_dates_already_stored_are_skipped():
+    all_stats = {"chair": [make_record("2025-02-11", price=99, stats_date="2025-02-12")]}
+    assert update_stats.merge_api_result(all_stats, "chair", _api_result([-2, -1]), CURRENT_DATE, last_polled="2025-02-10")
+    assert _dates(all_stats["chair"]) == ["2025-02-11", "2025-02-12"]
+    assert all_stats["chair"][0]["averagePrice"] == "99"
+
+    assert not update_stats.merge_api_result(all_stats, "chair", _api_result([-2, -1]), CURRENT_DATE, last_polled="2025-02-10")
+    assert len(all_stats["chair"]) == 2
+
+
+def test_records_without_date_use_stats_date_and_day_offset():
+    all_stats = {"chair": []}
+    api_result = _api_result([-2], stats_date="2025-02-12")
+    update_stats.merge_api_result(all_stats, "chair", api_result, CURRENT_DATE)
+    assert all_stats["chair"] == [
+        {"averagePrice": "10", "totalSoldItems": "1", "totalCreditSum": "10", "totalOpenOffers": "0", "statsDate": "2025-02-12", "date": "2025-02-10"}
+    ]
+
+
+def test_fill_dates_reinsert_days_before_the_last_poll():
+    all_stats = {"chair": [make_record("2025-02-08", stats_date="2025-02-12"), make_record("2025-02-11", stats_date="2025-02-12")]}
+    api_result = _api_result(range(-6, 0))
+    assert update_stats.merge_api_result(all_stats, "chair", api_result, CURRENT_DATE, last_polled="2025-02-12", fill_dates={"2025-02-09", "2025-02-11"})
+    # Il 9 viene reintegrato, l'11 è già presente, il 10 non è richiesto
+    assert _dates(all_stats["chair"]) == ["2025-02-08", "2025-02-09", "2025-02-11", "2025-02-12"]
+    assert all("dayOffset" not in record for record in all_stats["chair"])
@@ -1,22 +1,42 @@
 #!/usr/bin/env python3
+import argparse
+import asyncio
+import concurrent.futures
 import json
+import multiprocessing
 import os
+import signal
 import datetime
 import requests
-import time
 
-# URL del furnidata
-FURNIDATA_URL = "https://www.habbo.it/gamedata/furnidata_json/0"
+import aggregates
+import anomalies
+import export_stats
+import furnidata_stream
+import gap_scanner
+import gamedata_cache
+import history_store
+import hotels
+import http_client
+import poll_scheduler
+import run_metrics
+from rate_limiter import TokenBucket
+
+# URL del furnidata ({base} è l'URL base dell'hotel, vedi hotels.base_url)
+FURNIDATA_URL_TEMPLATE = "{base}/gamedata/furnidata_json/0"
 
 # Endpoint API per ottenere le statistiche
-ROOM_API_URL_TEMPLATE = "https://www.habbo.it/api/public/marketplace/stats/roomItem/{}"
-WALL_API_URL_TEMPLATE = "http://habbo.it/api/public/marketplace/stats/wallitem/{}"
+ROOM_API_URL_TEMPLATE = "{base}/api/public/marketplace/stats/roomItem/{classname}"
+WALL_API_URL_TEMPLATE = "{base}/api/public/marketplace/stats/wallitem/{classname}"
+
+# Ogni quanti items completati viene salvato un checkpoint
+CHECKPOINT_INTERVAL = int(os.environ.get("STATS_CHECKPOINT_INTERVAL", "500"))
 
-# File di output per la cronologia
-OUTPUT_FILE = "historical_stats.json"
+# Numero massimo di richieste contemporanee verso l'API del marketplace
+MAX_CONCURRENCY = int(os.environ.get("STATS_CONCURRENCY", "8"))
 
-# Limite massimo per il dayOffset (in negativo)
-HISTORY_LIMIT = 30
+# Rate iniziale (richieste al secondo) del token bucket condiviso
+INITIAL_RATE = float(os.environ.get("STATS_RATE", "4"))
 
 # Set di furniline da escludere (tutti in minuscolo)
 EXCLUDED_FURNILINE = {
@@ -43,174 +63,376 @@ EXCLUDED_FURNILINE = {
     "room_lido"
 }
 
-def load_classnames():
+# Tipo di item associato a ciascuna sezione del furnidata
+SECTION_TYPES = {"roomitemtypes": "room", "wallitemtypes": "wall"}
+
+def is_excluded(classname, furniline):
+    """
+    True se l'oggetto va escluso dalle statistiche:
+      - classname che inizia con "nft_" o "bc_"
+      - furniline presente nell'insieme EXCLUDED_FURNILINE.
+    """
+    if classname.startswith("nft_") or classname.startswith("bc_"):
+        return True
+    return bool(furniline) and furniline.lower() in EXCLUDED_FURNILINE
+
+def iter_classnames(chunks):
+    """
+    Estrae in streaming dal furnidata (iterabile di chunk di bytes) i dizionari
+    {"classname", "type", "furniline"} degli oggetti validi, senza caricare
+    l'intero documento.
+    """
+    for section, item in furnidata_stream.iter_furnitypes(chunks):
+        classname = item.get("classname", "")
+        furniline = item.get("furniline", "")
+        if is_excluded(classname, furniline):
+            continue
+        yield {"classname": classname, "type": SECTION_TYPES[section], "furniline": furniline}
+
+def load_classnames(hotel=hotels.DEFAULT_HOTEL):
     """
-    Carica il furnidata direttamente dall'API e restituisce una lista di dizionari contenenti:
+    Carica il furnidata dell'hotel e restituisce una lista di dizionari contenenti:
       - "classname": il nome dell'oggetto
       - "type": "room" oppure "wall"
-    Vengono esclusi gli oggetti che:
-      - Hanno un classname che inizia con "nft_" o "bc_"
-      - Hanno un campo "furniline" presente nell'insieme EXCLUDED_FURNILINE.
+      - "furniline": la linea dell'oggetto ("" se assente)
+    Il furnidata passa dalla cache condivisa (richiesta condizionale) e viene
+    analizzato in streaming (vedi iter_classnames), escludendo gli oggetti
+    indicati da is_excluded.
     """
     try:
-        response = requests.get(FURNIDATA_URL, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        result = []
-        # Processa roomitemtypes
-        room_items = data.get("roomitemtypes", {}).get("furnitype", [])
-        for item in room_items:
-            classname = item.get("classname", "")
-            furniline = item.get("furniline", "")
-            if classname.startswith("nft_") or classname.startswith("bc_"):
-                continue
-            if furniline and furniline.lower() in EXCLUDED_FURNILINE:
-                continue
-            result.append({"classname": classname, "type": "room"})
-        # Processa wallitemtypes
-        wall_items = data.get("wallitemtypes", {}).get("furnitype", [])
-        for item in wall_items:
-            classname = item.get("classname", "")
-            furniline = item.get("furniline", "")
-            if classname.startswith("nft_") or classname.startswith("bc_"):
-                continue
-            if furniline and furniline.lower() in EXCLUDED_FURNILINE:
-                continue
-            result.append({"classname": classname, "type": "wall"})
+        resource = gamedata_cache.fetch(FURNIDATA_URL_TEMPLATE.format(base=hotels.base_url(hotel)))
+        result = list(iter_classnames(gamedata_cache.iter_chunks(resource)))
         print(f"Found {len(result)} valid classnames from furnidata.")
         return result
     except Exception as e:
         print("Error fetching classnames from furnidata:", e)
         return []
 
-def load_historical_stats():
+def load_checkpoint(paths, current_date):
+    """
+    Restituisce l'insieme dei classnames completati secondo il checkpoint,
+    solo se il checkpoint si riferisce a 'current_date'.
+    """
+    checkpoint_file = paths["checkpoint_file"]
+    if not os.path.exists(checkpoint_file):
+        return set()
+    try:
+        with open(checkpoint_file, "r", encoding="utf-8") as f:
+            checkpoint = json.load(f)
+    except Exception as e:
+        print(f"Error reading checkpoint, ignoring it: {e}")
+        return set()
+    if checkpoint.get("date") != current_date.isoformat():
+        return set()
+    return set(checkpoint.get("completed", []))
+
+def save_checkpoint(paths, stats, poll_state, changed, completed, current_date):
     """
-    Carica il file storico se esiste, altrimenti restituisce un dizionario vuoto.
+    Salva gli shard modificati della cronologia parziale, lo stato del polling
+    e l'elenco dei classnames già completati. 'changed' viene svuotato dopo il salvataggio.
     """
-    if os.path.exists(OUTPUT_FILE):
-        with open(OUTPUT_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
+    history_store.save(stats, changed, paths["store_dir"], paths["legacy_file"])
+    poll_scheduler.save_poll_state(paths["poll_state_file"], poll_state)
+    changed.clear()
+    checkpoint_file = paths["checkpoint_file"]
+    tmp_file = checkpoint_file + ".tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump({"date": current_date.isoformat(), "completed": sorted(completed)}, f)
+    os.replace(tmp_file, checkpoint_file)
+    print(f"Checkpoint saved ({len(completed)} items completed).")
+
+def clear_checkpoint(paths):
+    if os.path.exists(paths["checkpoint_file"]):
+        os.remove(paths["checkpoint_file"])
 
-def save_historical_stats(stats):
+def already_updated(classname, history, poll_state, current_date):
     """
-    Salva il dizionario 'stats' nel file OUTPUT_FILE in formato JSON.
+    True se l'item è già stato raccolto in 'current_date'.
     """
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(stats, f, indent=2, ensure_ascii=False)
+    if poll_state.get(classname) == current_date.isoformat():
+        return True
+    return bool(history) and history[-1].get("statsDate") == current_date.isoformat()
 
-def fetch_stats_for_item(item, max_retries=3):
+async def fetch_stats_for_item(item, base_url, limiter, executor, max_retries=3):
     """
     Esegue il fetch dei dati dall'API per un determinato item.
-    Usa ROOM_API_URL_TEMPLATE per i roomitem e WALL_API_URL_TEMPLATE per i wallitem.
-    Implementa retry con backoff in caso di errore 429.
+    Usa ROOM_API_URL_TEMPLATE per i roomitem e WALL_API_URL_TEMPLATE per i wallitem,
+    sull'URL base dell'hotel 'base_url'.
+    Ogni tentativo consuma un token dal limiter condiviso; in caso di errore 429
+    il limiter riduce il rate globale e sospende tutte le richieste.
     """
     classname = item["classname"]
     item_type = item["type"]
-    url = ROOM_API_URL_TEMPLATE.format(classname) if item_type == "room" else WALL_API_URL_TEMPLATE.format(classname)
-    
-    retries = 0
-    wait_time = 5  # secondi iniziali
-    while retries < max_retries:
+    template = ROOM_API_URL_TEMPLATE if item_type == "room" else WALL_API_URL_TEMPLATE
+    url = template.format(base=base_url, classname=classname)
+    loop = asyncio.get_running_loop()
+
+    for _ in range(max_retries):
+        acquired_at = await limiter.acquire()
+        try:
+            response = await loop.run_in_executor(executor, lambda: http_client.get(url))
+        except Exception as e:
+            print(f"Error fetching stats for {classname}: {e}")
+            return None
+        if response.status_code == 429:
+            pause = limiter.penalize(response.headers.get("Retry-After"), acquired_at)
+            print(f"Too many requests for {classname}. Pausing all requests for {pause} seconds (rate now {limiter.rate:.2f}/s)...")
+            continue
         try:
-            response = requests.get(url, timeout=10)
             response.raise_for_status()
-            print(f"Fetched stats for {classname}.")
-            return response.json()
+            data = response.json()
         except requests.exceptions.HTTPError as e:
-            if response.status_code == 429:
-                print(f"Too many requests for {classname}. Waiting {wait_time} seconds before retry...")
-                time.sleep(wait_time)
-                retries += 1
-                wait_time *= 2  # backoff esponenziale
-                continue
-            else:
-                print(f"HTTP error for {classname}: {e}")
-                return None
+            print(f"HTTP error for {classname}: {e}")
+            return None
         except Exception as e:
             print(f"Error fetching stats for {classname}: {e}")
             return None
+        limiter.reward()
+        print(f"Fetched stats for {classname}.")
+        return data
     print(f"Max retries reached for {classname}. Skipping...")
     return None
 
-def update_day_offsets(history, current_date, api_stats_date):
+async def fetch_all_stats(items, on_result, hotel=hotels.DEFAULT_HOTEL, concurrency=MAX_CONCURRENCY, rate=INITIAL_RATE):
     """
-    Per ogni record della cronologia:
-      - Se il record non ha il campo "date", lo calcola come:
-            date = (api_stats_date) + (int(record["dayOffset"]) giorni)
-      - Calcola il nuovo dayOffset come:
-            new_day_offset = -( (current_date - date).days )
-        (limitato a -HISTORY_LIMIT se necessario)
-      - Il campo "date" rimane fisso.
+    Scarica le statistiche di tutti gli items con al massimo 'concurrency'
+    richieste in corso e un unico token bucket condiviso.
+    'on_result(item, api_result)' viene chiamata nel loop asyncio man mano che
+    le risposte arrivano, quindi non richiede lock.
+    Ogni hotel ha il proprio limiter: i rate limit dei domini sono indipendenti.
     """
-    updated_history = []
-    api_stats_date_obj = datetime.datetime.strptime(api_stats_date, "%Y-%m-%d").date()
-    for record in history:
+    base_url = hotels.base_url(hotel)
+    limiter = TokenBucket(rate)
+    # Un pool keep-alive grande quanto la concorrenza: nessun handshake ripetuto
+    http_client.get_session(pool_size=concurrency)
+    pending = iter(items)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        async def worker():
+            for item in pending:
+                api_result = await fetch_stats_for_item(item, base_url, limiter, executor)
+                on_result(item, api_result)
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+def assign_dates(records, api_stats_date):
+    """
+    Prepara i record appena ricevuti dall'API per il salvataggio:
+      - se manca "date", la calcola come api_stats_date + dayOffset;
+      - rimuove "dayOffset", che dipende dal giorno di lettura e viene
+        derivato da "date" con history_store.day_offset.
+    Tocca solo i record passati, non l'intera cronologia.
+    """
+    api_stats_date_obj = datetime.date.fromisoformat(api_stats_date)
+    for record in records:
         try:
             if "date" not in record:
                 api_day_offset = int(record.get("dayOffset", "0"))
-                computed_date = api_stats_date_obj + datetime.timedelta(days=api_day_offset)
-                record["date"] = computed_date.isoformat()
-            else:
-                computed_date = datetime.datetime.strptime(record["date"], "%Y-%m-%d").date()
-            delta = (current_date - computed_date).days
-            new_day_offset = -delta
-            if new_day_offset < -HISTORY_LIMIT:
-                new_day_offset = -HISTORY_LIMIT
-            record["dayOffset"] = str(new_day_offset)
-            updated_history.append(record)
+                record["date"] = (api_stats_date_obj + datetime.timedelta(days=api_day_offset)).isoformat()
         except Exception as e:
-            print(f"Error updating dayOffset for record: {e}")
-            updated_history.append(record)
-    return updated_history
+            print(f"Error computing date for record: {e}")
+        record.pop("dayOffset", None)
+    return records
+
+def merge_api_result(all_stats, classname, api_result, current_date, last_polled=None, fill_dates=None):
+    """
+    Integra la risposta dell'API per 'classname' nella cronologia 'all_stats'.
+    Per un item già presente vengono aggiunti tutti i record della risposta
+    (fino a HISTORY_LIMIT giorni) successivi all'ultimo fetch riuscito
+    'last_polled' (vedi poll_scheduler.coverage_date): interrogare un item ogni
+    N giorni non fa perdere dati finché N resta entro la finestra dell'API.
+    Vengono aggiunti anche i record dei giorni in 'fill_dates' (date ISO)
+    non ancora presenti, anche se precedenti all'ultimo fetch (backfill).
+    Restituisce True se la cronologia dell'item è cambiata.
+    """
+    # Otteniamo la data di riferimento dalla API; se non esiste, usiamo la data corrente.
+    api_stats_date = api_result.get("statsDate", current_date.isoformat())
+    history_list = api_result.get("history", [])
+    # Per ogni record, se manca "statsDate", lo impostiamo con api_stats_date
+    for rec in history_list:
+        if "statsDate" not in rec:
+            rec["statsDate"] = api_stats_date
+    # Calcola e imposta il campo "date" per ciascun record
+    history_list = assign_dates(history_list, api_stats_date)
+
+    if classname not in all_stats:
+        all_stats[classname] = history_list
+        print(f"Saved complete history for {classname} ({len(history_list)} records).")
+        return True
+
+    history = all_stats[classname]
+    coverage = poll_scheduler.coverage_date(history, last_polled)
+    known_dates = {record.get("date") for record in history}
+    fill_dates = fill_dates or set()
+    new_records = [
+        record for record in history_list
+        if record["date"] not in known_dates
+        and (coverage is None or datetime.date.fromisoformat(record["date"]) >= coverage or record["date"] in fill_dates)
+    ]
+    if not new_records:
+        print(f"No new records for {classname}.")
+        return False
+    history.extend(new_records)
+    # I record reintegrati possono precedere quelli già presenti
+    history.sort(key=lambda record: record["date"])
+    print(f"Added {len(new_records)} new records for {classname}.")
+    return True
+
+def interrupt_on_signals():
+    """
+    SIGINT e SIGTERM (inviati alla cancellazione di un job CI) sollevano
+    KeyboardInterrupt, che interrompe il fetch salvando il checkpoint (vedi
+    _run_hotel). Impostati esplicitamente perché un processo avviato in
+    background da una shell eredita SIGINT ignorato.
+    """
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, signal.default_int_handler)
+
+def run_hotel(hotel, resume=False, full=False, backfill=False):
+    """
+    Aggiorna la cronologia di un singolo hotel nel suo store.
+    Salvo 'full', vengono interrogati solo gli items dovuti oggi secondo
+    poll_scheduler (tutti i classnames nuovi, gli altri in base all'attività).
+    Con 'backfill' vengono interrogati solo gli items con lacune recuperabili
+    (vedi gap_scanner) e i giorni mancanti vengono reintegrati.
+    Al termine, anche in caso di errore, scrive il report dell'esecuzione
+    (tempi delle fasi, latenze, 429) in run_metrics.METRICS_DIR.
+    """
+    run_metrics.reset()
+    interrupt_on_signals()
+    try:
+        _run_hotel(hotel, resume, full, backfill)
+    finally:
+        run_metrics.write_report(f"update_stats_{hotel.replace('.', '_')}")
 
-def main():
+def _run_hotel(hotel, resume, full, backfill):
     current_date = datetime.date.today()
-    # Carica i classnames dal furnidata API
-    items = load_classnames()
-    all_stats = load_historical_stats()
-    
-    for item in items:
-        classname = item["classname"]
-        print(f"Fetching stats for {classname} ({item['type']})...")
-        api_result = fetch_stats_for_item(item)
+    paths = hotels.output_paths(hotel)
+    with run_metrics.phase("load"):
+        # Carica i classnames dal furnidata dell'hotel
+        items = load_classnames(hotel)
+        all_stats = history_store.load_all(paths["store_dir"], paths["legacy_file"])
+        poll_state = poll_scheduler.load_poll_state(paths["poll_state_file"])
+
+    # Classnames modificati dall'ultimo salvataggio (determinano gli shard da riscrivere)
+    changed = set()
+    completed = set()
+    with run_metrics.phase("schedule"):
+        if resume:
+            # Riprende un'esecuzione interrotta: salta gli items già completati oggi
+            completed = load_checkpoint(paths, current_date)
+            completed.update(classname for classname, history in all_stats.items() if already_updated(classname, history, poll_state, current_date))
+            items = [item for item in items if item["classname"] not in completed]
+            print(f"[{hotel}] Resuming run for {current_date.isoformat()}: {len(completed)} items already done, {len(items)} remaining.")
+        fill_dates = set()
+        if backfill:
+            report = gap_scanner.scan(all_stats, poll_state, current_date)
+            targets, fill_dates = gap_scanner.backfill_targets(all_stats, report, current_date)
+            items = [item for item in items if item["classname"] in targets]
+            print(f"[{hotel}] Backfill: {len(items)} items to poll, {len(fill_dates)} missing days to refill, "
+                  f"{report['lost_dates']} days and {report['lost_item_days']} item-days already lost.")
+        elif not full:
+            items = poll_scheduler.select_due(items, all_stats, poll_state, current_date)
+    run_metrics.incr("items_total", len(items), result="scheduled")
+
+    since_checkpoint = 0
+
+    def on_result(item, api_result):
+        nonlocal since_checkpoint
         if api_result is None:
-            continue
-        
-        # Otteniamo la data di riferimento dalla API; se non esiste, usiamo la data corrente.
-        api_stats_date = api_result.get("statsDate", current_date.isoformat())
-        
-        if classname not in all_stats:
-            history_list = api_result.get("history", [])
-            # Per ogni record, se manca "statsDate", lo impostiamo con api_stats_date
-            for rec in history_list:
-                if "statsDate" not in rec:
-                    rec["statsDate"] = api_stats_date
-            # Calcola e imposta il campo "date" per ciascun record
-            all_stats[classname] = update_day_offsets(history_list, current_date, api_stats_date)
-            print(f"Saved complete history for {classname} ({len(history_list)} records).")
-        else:
-            # Se il classname esiste già, aggiungi solo il nuovo record se non già aggiornato per oggi
-            new_entry = None
-            for rec in api_result.get("history", []):
-                if rec.get("dayOffset") == "-1":
-                    new_entry = rec
-                    break
-            if new_entry is None and api_result.get("history"):
-                new_entry = api_result["history"][-1]
-            if new_entry:
-                new_entry["statsDate"] = current_date.isoformat()
-                new_entry["date"] = current_date.isoformat()
-                last_date = datetime.datetime.strptime(all_stats[classname][-1]["statsDate"], "%Y-%m-%d").date()
-                if last_date < current_date:
-                    all_stats[classname].append(new_entry)
-                    print(f"Added new record for {classname}.")
-                else:
-                    print(f"Record for {classname} already updated for today.")
-            all_stats[classname] = update_day_offsets(all_stats[classname], current_date, api_stats_date)
-    
-    save_historical_stats(all_stats)
-    print("Update completed.")
+            run_metrics.incr("items_total", result="failed")
+            return
+        classname = item["classname"]
+        # Tempo di merge (incluso anche nella fase "fetch", durante la quale avviene)
+        with run_metrics.phase("merge"):
+            if merge_api_result(all_stats, classname, api_result, current_date, poll_state.get(classname), fill_dates):
+                changed.add(classname)
+                run_metrics.incr("items_total", result="changed")
+            else:
+                run_metrics.incr("items_total", result="unchanged")
+        poll_state[classname] = current_date.isoformat()
+        completed.add(classname)
+        since_checkpoint += 1
+        if since_checkpoint >= CHECKPOINT_INTERVAL:
+            with run_metrics.phase("checkpoint"):
+                save_checkpoint(paths, all_stats, poll_state, changed, completed, current_date)
+            since_checkpoint = 0
+
+    print(f"[{hotel}] Fetching stats for {len(items)} items (concurrency {MAX_CONCURRENCY}, initial rate {INITIAL_RATE}/s)...")
+    try:
+        with run_metrics.phase("fetch"):
+            asyncio.run(fetch_all_stats(items, on_result, hotel))
+    except BaseException:
+        # Interruzione (timeout, cancellazione, errore): conserva il lavoro svolto
+        with run_metrics.phase("checkpoint"):
+            save_checkpoint(paths, all_stats, poll_state, changed, completed, current_date)
+        raise
+
+    with run_metrics.phase("save"):
+        written = history_store.save(all_stats, changed, paths["store_dir"], paths["legacy_file"])
+        poll_scheduler.save_poll_state(paths["poll_state_file"], poll_state)
+    run_metrics.incr("history_shards_written_total", written)
+    print(f"[{hotel}] Saved {written} history shards.")
+    clear_checkpoint(paths)
+    with run_metrics.phase("aggregates"):
+        try:
+            aggregates.update(all_stats, completed, poll_state, paths["aggregates_dir"], current_date)
+        except Exception as e:
+            print(f"[{hotel}] Error updating aggregates: {e}")
+    with run_metrics.phase("anomalies"):
+        try:
+            found = anomalies.update(all_stats, paths["aggregates_dir"], current_date, hotel)
+            run_metrics.incr("anomalies_total", len(found))
+        except Exception as e:
+            print(f"[{hotel}] Error detecting anomalies: {e}")
+    with run_metrics.phase("export"):
+        try:
+            exported = export_stats.export(paths["exports_dir"], current_date, paths["store_dir"], paths["legacy_file"])
+            print(f"[{hotel}] Exported {len(exported)} days to {paths['exports_dir']}.")
+        except Exception as e:
+            print(f"[{hotel}] Error exporting stats: {e}")
+    print(f"[{hotel}] Update completed.")
+
+def main(hotel_codes=None, resume=False, full=False, backfill=False):
+    """
+    Aggiorna le statistiche degli hotel indicati (di default solo DEFAULT_HOTEL).
+    Con più hotel ognuno gira in un processo separato, con il proprio rate
+    limiter, la propria sessione HTTP e il proprio store.
+    """
+    hotel_codes = hotel_codes or [hotels.DEFAULT_HOTEL]
+    if len(hotel_codes) == 1:
+        run_hotel(hotel_codes[0], resume, full, backfill)
+        return
+    interrupt_on_signals()
+    failed = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=len(hotel_codes)) as pool:
+        futures = {pool.submit(run_hotel, hotel, resume, full, backfill): hotel for hotel in hotel_codes}
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                hotel = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"[{hotel}] Update failed: {e}")
+                    failed.append(hotel)
+        except KeyboardInterrupt:
+            # Il segnale arriva solo a questo processo: lo inoltra ai processi
+            # degli hotel perché salvino il checkpoint, poi ne attende la fine
+            print("Interrupted, saving checkpoints...")
+            for process in multiprocessing.active_children():
+                os.kill(process.pid, signal.SIGTERM)
+            raise
+    if failed:
+        raise SystemExit(f"Update failed for hotels: {', '.join(sorted(failed))}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Update the marketplace price history.")
+    parser.add_argument("--resume", action="store_true", help="skip items already completed today")
+    parser.add_argument("--hotel", action="append", choices=sorted(hotels.HOTELS), help=f"hotel to update (repeatable, default: {hotels.DEFAULT_HOTEL})")
+    parser.add_argument("--full", action="store_true", help="poll every item, ignoring the activity-based schedule")
+    parser.add_argument("--all-hotels", action="store_true", help="update every hotel in hotels.HOTELS")
+    parser.add_argument("--backfill", action="store_true", help="poll only the items with recoverable gaps (see gap_scanner.py)")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(sorted(hotels.HOTELS) if args.all_hotels else args.hotel, resume=args.resume, full=args.full, backfill=args.backfill)